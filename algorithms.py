@@ -4,11 +4,10 @@ import threading
 import math
 from heapq import heappush, heappop
 
-import pygame
-
+from bitset_engines import SolverCancelled, check_cancelled
 from config import DEBUG_HOVER_COLOR
-from math_text import get_math_surface
 from utils import GraphState
+from solver_pool import submit_solver
 
 
 class GraphAlgorithm:
@@ -21,30 +20,44 @@ class GraphAlgorithm:
         self.edge_result = []    # edge path
         self.active = False
         self.requires_source_target = True
+        self.uses_positions = False  # run() reads the snapshot's vertex positions
         self.source = None
         self.target = None
         self.needs_update = True
+        self.revision = 0  # bumped whenever the displayed result changes
         self.graph_state = GraphState(lambda: self.vertices, lambda: self.edges)
 
-        self._thread = None
+        self._cancel_run = None
+        self._run_id = 0
+        self._lock = threading.Lock()  # guards publishing results against newer runs
         self._result_ready = False
+        self.error = None  # message of the exception that ended the last run, if any
         self._render_cache = []  # List of (bounding_rect, surfaces_to_blit)
         self._cached_mouse_pos = None  # Optional: skip repeat hovers on same row
 
     def reset(self):
+        self._cancel()
         self.result.clear()
         self.edge_result.clear()
         self.active = False
         self.needs_update = True
-        self._thread = None
         self._result_ready = False
+        self.error = None
         self._last_state_key = None
+        self.revision += 1
+
+    def _cancel(self):
+        with self._lock:
+            self._run_id += 1  # whatever is still running is stale from now on
+            cancel, self._cancel_run = self._cancel_run, None
+        if cancel is not None:
+            cancel()
 
     def update(self, source, target, directed=False, compute_enabled=True):
         if not compute_enabled:
             return
 
-        state_key = (self.graph_state._hash_graph(), source, target, directed)
+        state_key = (self.graph_state.version(), source, target, directed)
 
         if getattr(self, "_last_state_key", None) == state_key:
             return  # no change
@@ -57,22 +70,52 @@ class GraphAlgorithm:
         if self.requires_source_target and (not source or not target):
             return
 
-        if self._thread is None and self.needs_update:
-            self.result.clear()
-            self.edge_result.clear()
+        self._cancel()
+        with self._lock:
+            run_id = self._run_id
+            self.result = []
+            self.edge_result = []
             self.active = False
             self._result_ready = False
-            self._thread = threading.Thread(target=self._run_thread, args=(source, target, directed), daemon=True)
-            self._thread.start()
+            self.error = None
+            self.revision += 1
+
+        snapshot = self.graph_state.get_snapshot()
+        if self.uses_positions:
+            # Snapshots are cached per structural version, so dragging, physics
+            # and layout leave their positions stale; read the live ones instead
+            snapshot = snapshot.with_positions(self.vertices)
+
+        self._cancel_run = submit_solver(
+            solve_algorithm, type(self), snapshot, source, target, directed,
+            on_done=lambda out: self._publish(run_id, out),
+            on_error=lambda e: self._fail(run_id, e))
+
+    def _publish(self, run_id, out):
+        with self._lock:
+            if run_id != self._run_id:
+                return  # superseded by a newer request
+            self.result, self.edge_result, _ = out
+            self._result_ready = True
+            self.active = True
+            self.revision += 1
+            self.needs_update = False
 
-    def _run_thread(self, source, target, directed):
-        self.run(source, target, directed)
-        self._result_ready = True
-        self.active = True
-        self._thread = None
+    def _fail(self, run_id, error):
+        with self._lock:
+            if run_id != self._run_id:
+                return
+            self.result, self.edge_result = [], []
+            self.error = str(error) or type(error).__name__
+            self._result_ready = True
+            self.active = True
+            self.revision += 1
+            self.needs_update = False
 
 
     def render_debug(self, screen, font, y, mouse_pos, directed):
+        import pygame
+        from math_text import get_math_surface
         self.update(self.source, self.target, directed)
         row_rect = pygame.Rect(10, y, 300, 20)
         hovered = row_rect.collidepoint(mouse_pos)
@@ -88,6 +131,9 @@ class GraphAlgorithm:
         elif not self._result_ready:
             result_surface = font.render("Computing...", True, color)
             elements = []
+        elif self.error is not None:
+            result_surface = font.render("Failed", True, color)
+            elements = []
         elif self.result == [] and self.active:
             result_surface = font.render("Undefined", True, color)
             elements = []
@@ -110,142 +156,123 @@ class GraphAlgorithm:
 
         return y + 20, hovered, elements
     def has_negative_weights(self):
-        for e in self.edges:
-            try:
-                w = float(e.value) if e.value is not None else 1.0
-            except ValueError:
-                w = 1.0
-            if w < 0:
-                return True
-        return False
+        return any(w < 0 for w in self.graph_state.get_snapshot().edge_w)
+
+    @staticmethod
+    def _walk_back(csr, prev, source, target):
+        """Names on the path source -> target through `prev` ids, or None if unreachable."""
+        if source == target:
+            return [csr.names[source]]
+        path = [target]
+        while path[-1] != source:
+            if prev[path[-1]] < 0:
+                return None
+            path.append(prev[path[-1]])
+        path.reverse()
+        return [csr.names[i] for i in path]
+
+    def _set_path(self, path):
+        if path is None:
+            self.result = []
+            self.edge_result = []
+            self.active = False
+            return
+        self.result = path
+        self.edge_result = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
+        self.active = True
 
 
 class DijkstraSolver(GraphAlgorithm):
     def __init__(self, vertices, edges):
         super().__init__("DIJKSTRA", vertices, edges)
 
-    def run(self, source_name, target_name=None, directed=False):
+    def run(self, source_name, target_name=None, directed=False, cancel_event=None):
         if self.has_negative_weights():
             self.result = []
             self.edge_result = []
             self.active = True
             return
 
-        adj = self.graph_state.get_adj(directed)
+        csr = self.graph_state.get_csr(directed)
+        source = csr.index.get(source_name)
+        target = csr.index.get(target_name)
+        if source is None or target is None:
+            self._set_path(None)
+            return
 
-        dist = {v: float('inf') for v in adj}
-        prev = {}
-        dist[source_name] = 0
-        heap = [(0, source_name)]
+        offsets, targets, weights = csr.offsets, csr.targets, csr.weights
+        dist = [float('inf')] * csr.n
+        prev = [-1] * csr.n
+        dist[source] = 0
+        heap = [(0, source)]
 
         while heap:
+            check_cancelled(cancel_event)
             d, u = heapq.heappop(heap)
-            if u == target_name:
+            if u == target:
                 break
             if d > dist[u]:
                 continue
-            for v, w in adj[u]:
-                if dist[u] + w < dist[v]:
-                    dist[v] = dist[u] + w
+            for p in range(offsets[u], offsets[u + 1]):
+                v = targets[p]
+                nd = d + weights[p]
+                if nd < dist[v]:
+                    dist[v] = nd
                     prev[v] = u
-                    heapq.heappush(heap, (dist[v], v))
-
-        if source_name == target_name:
-            self.result = [source_name]
-            self.edge_result = []
-            self.active = True
-            return
-
-        path = [target_name]
-        while path[-1] != source_name:
-            if path[-1] not in prev:
-                self.result = []
-                self.edge_result = []
-                self.active = False
-                return
-            path.append(prev[path[-1]])
-        path.reverse()
+                    heapq.heappush(heap, (nd, v))
 
-        self.result = path
-        self.edge_result = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
-        self.active = True
+        self._set_path(self._walk_back(csr, prev, source, target))
 
 
 class BellmanFordSolver(GraphAlgorithm):
     def __init__(self, vertices, edges):
         super().__init__("BELLMAN-FORD", vertices, edges)
 
-    def run(self, source_name, target_name=None, directed=False):
-        adj = self.graph_state.get_adj(directed)
-
-
-        dist = {v: float('inf') for v in adj}
-        prev = {}
-        dist[source_name] = 0
+    def run(self, source_name, target_name=None, directed=False, cancel_event=None):
+        csr = self.graph_state.get_csr(directed)
+        source = csr.index.get(source_name)
+        target = csr.index.get(target_name)
+        if source is None or target is None:
+            self._set_path(None)
+            return
 
-        for _ in range(len(self.vertices) - 1):
-            for u in adj:
-                for v, w in adj[u]:
-                    if dist[u] + w < dist[v]:
-                        dist[v] = dist[u] + w
+        offsets, targets, weights = csr.offsets, csr.targets, csr.weights
+        dist = [float('inf')] * csr.n
+        prev = [-1] * csr.n
+        dist[source] = 0
+
+        for _ in range(csr.n - 1):
+            check_cancelled(cancel_event)
+            changed = False
+            for u in range(csr.n):
+                du = dist[u]
+                if du == float('inf'):
+                    continue
+                for p in range(offsets[u], offsets[u + 1]):
+                    v = targets[p]
+                    if du + weights[p] < dist[v]:
+                        dist[v] = du + weights[p]
                         prev[v] = u
+                        changed = True
+            if not changed:
+                break
 
-        for u in adj:
-            for v, w in adj[u]:
-                if dist[u] + w < dist[v]:
-                    self.result = []
-                    self.edge_result = []
-                    self.active = False
+        for u in range(csr.n):
+            for p in range(offsets[u], offsets[u + 1]):
+                if dist[u] + weights[p] < dist[targets[p]]:
+                    self._set_path(None)
                     return
 
-        if source_name == target_name:
-            self.result = [source_name]
-            self.edge_result = []
-            self.active = True
-            return
-
-        path = []
-        v = target_name
-        while v in prev:
-            path.append(v)
-            v = prev[v]
-        if v != source_name:
-            self.result = []
-            self.edge_result = []
-            self.active = False
-            return
-
-        path.append(source_name)
-        path.reverse()
-        self.result = path
-        self.edge_result = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
-        self.active = True
+        self._set_path(self._walk_back(csr, prev, source, target))
 
 
 class AStarSolver(GraphAlgorithm):
     def __init__(self, vertices, edges):
         super().__init__("A*", vertices, edges)
+        self.uses_positions = True  # the heuristic measures distances between vertex positions
 
-    def heuristic(self, a, b):
-        v1 = next((v for v in self.vertices if v.name == a), None)
-        v2 = next((v for v in self.vertices if v.name == b), None)
-        if v1 and v2 and hasattr(v1, 'pos') and hasattr(v2, 'pos'):
-            x1, y1 = v1.pos
-            x2, y2 = v2.pos
-            distance = math.hypot(x2 - x1, y2 - y1)
-
-            try:
-                weights = [float(e.value) if e.value is not None else 1.0 for e in self.edges]
-                avg_weight = sum(weights) / len(weights)
-            except:
-                avg_weight = 1.0
-
-            return distance / avg_weight  # Scaled heuristic
-        return 0
-
-    def run(self, source_name, target_name=None, directed=False):
-        adj = self.graph_state.get_adj(directed)
-
+    def run(self, source_name, target_name=None, directed=False, cancel_event=None):
+        csr = self.graph_state.get_csr(directed)
 
         if self.has_negative_weights():
             self.result = []
@@ -253,81 +280,74 @@ class AStarSolver(GraphAlgorithm):
             self.active = True
             return
 
-        open_set = [(0 + self.heuristic(source_name, target_name), 0, source_name)]
-        came_from = {}
-        g_score = {v: float('inf') for v in adj}
-        g_score[source_name] = 0
+        source = csr.index.get(source_name)
+        target = csr.index.get(target_name)
+        if source is None or target is None:
+            self._set_path(None)
+            return
+
+        # Heuristic: Euclidean distance to the target, scaled by the average edge weight
+        snapshot = self.graph_state.get_snapshot()
+        xs, ys = snapshot.xs, snapshot.ys
+        tx, ty = xs[target], ys[target]
+        avg_weight = (sum(csr.edge_w) / csr.edge_count if csr.edge_count else 1.0) or 1.0
+        heuristic = [math.hypot(tx - xs[i], ty - ys[i]) / avg_weight for i in range(csr.n)]
+
+        offsets, targets, weights = csr.offsets, csr.targets, csr.weights
+        open_set = [(heuristic[source], 0, source)]
+        came_from = [-1] * csr.n
+        g_score = [float('inf')] * csr.n
+        g_score[source] = 0
 
         while open_set:
+            check_cancelled(cancel_event)
             _, current_cost, current = heapq.heappop(open_set)
 
-            if current == target_name:
+            if current == target:
                 break
+            if current_cost > g_score[current]:
+                continue
 
-            for neighbor, weight in adj[current]:
-                tentative_g = g_score[current] + weight
+            for p in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[p]
+                tentative_g = current_cost + weights[p]
                 if tentative_g < g_score[neighbor]:
                     came_from[neighbor] = current
                     g_score[neighbor] = tentative_g
-                    f_score = tentative_g + self.heuristic(neighbor, target_name)
-                    heapq.heappush(open_set, (f_score, tentative_g, neighbor))
-
-        if source_name == target_name:
-            self.result = [source_name]
-            self.edge_result = []
-            self.active = True
-            return
-
-        path = [target_name]
-        while path[-1] != source_name:
-            if path[-1] not in came_from:
-                self.result = []
-                self.edge_result = []
-                self.active = False
-                return
-            path.append(came_from[path[-1]])
-        path.reverse()
+                    heapq.heappush(open_set, (tentative_g + heuristic[neighbor], tentative_g, neighbor))
 
-        self.result = path
-        self.edge_result = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
-        self.active = True
+        self._set_path(self._walk_back(csr, came_from, source, target))
 
 class KruskalSolver(GraphAlgorithm):
     def __init__(self, vertices, edges):
         super().__init__("KRUSKAL", vertices, edges)
         self.requires_source_target = False
 
-    def run(self, source_name=None, target_name=None, directed=False):
+    def run(self, source_name=None, target_name=None, directed=False, cancel_event=None):
         if directed:
             self.result = []
             self.edge_result = []
             self.active = True
             return
 
-        parent = {}
+        csr = self.graph_state.get_csr(directed)
+        parent = list(range(csr.n))
+
         def find(v):
             while parent[v] != v:
                 parent[v] = parent[parent[v]]
                 v = parent[v]
             return v
 
-        def union(a, b):
-            parent[find(a)] = find(b)
-
-        for v in self.vertices:
-            parent[v.name] = v.name
-
-        edge_objs = sorted(
-            self.edges,
-            key=lambda e: float(e.value) if e.value is not None else 1.0
-        )
+        order = sorted(range(csr.edge_count), key=csr.edge_w.__getitem__)
 
         mst_edges = []
-        for e in edge_objs:
-            u, v = e.start.name, e.end.name
-            if find(u) != find(v):
-                mst_edges.append((u, v))
-                union(u, v)
+        for i in order:
+            u, v = csr.edge_src[i], csr.edge_dst[i]
+            ru, rv = find(u), find(v)
+            if ru != rv:
+                mst_edges.append((csr.names[u], csr.names[v]))
+                parent[ru] = rv
 
         self.result = mst_edges
         self.edge_result = mst_edges
@@ -338,52 +358,56 @@ class PrimSolver(GraphAlgorithm):
         super().__init__("PRIM", vertices, edges)
         self.requires_source_target = False
 
-    def get_weighted_undirected_adj(self):
-        adj = {v.name: [] for v in self.vertices}
-        for e in self.edges:
-            try:
-                w = float(e.value) if e.value is not None else 1.0
-            except ValueError:
-                w = 1.0
-            adj[e.start.name].append((w, e.end.name))
-            adj[e.end.name].append((w, e.start.name))
-        return adj
-
-    def run(self, source_name=None, target_name=None, directed=False):
-        if directed or not self.vertices:
+    def run(self, source_name=None, target_name=None, directed=False, cancel_event=None):
+        csr = self.graph_state.get_csr(directed=False)
+        if directed or not csr.n:
             self.result = []
             self.edge_result = []
             self.active = True
             return
 
-        adj = self.get_weighted_undirected_adj()
+        offsets, targets, weights = csr.offsets, csr.targets, csr.weights
 
-        visited = set()
+        visited = bytearray(csr.n)
         mst_edges = []
 
         # Run Prim separately on each component
-        for v in self.vertices:
-            if v.name in visited:
+        for root in range(csr.n):
+            if visited[root]:
                 continue
 
-            heap = [(0, v.name, None)]
+            heap = [(0, root, -1)]
 
             while heap:
+                check_cancelled(cancel_event)
                 weight, current, parent = heappop(heap)
-                if current in visited:
+                if visited[current]:
                     continue
-                visited.add(current)
-                if parent is not None:
-                    mst_edges.append((parent, current))
-                for w, neighbor in adj[current]:
-                    if neighbor not in visited:
-                        heappush(heap, (w, neighbor, current))
+                visited[current] = 1
+                if parent >= 0:
+                    mst_edges.append((csr.names[parent], csr.names[current]))
+                for p in range(offsets[current], offsets[current + 1]):
+                    neighbor = targets[p]
+                    if not visited[neighbor]:
+                        heappush(heap, (weights[p], neighbor, current))
 
         self.result = mst_edges
         self.edge_result = mst_edges
         self.active = True
 
 
+def solve_algorithm(algorithm_cls, snapshot, source, target, directed, cancel_event):
+    """Run one algorithm on a graph snapshot; executed by the solver backend
+    (a worker process or a background thread). Returns None when cancelled."""
+    algorithm = algorithm_cls(None, None)
+    algorithm.graph_state = GraphState.from_snapshot(snapshot)
+    try:
+        algorithm.run(source, target, directed, cancel_event)
+    except SolverCancelled:
+        return None
+    return algorithm.result, algorithm.edge_result, algorithm.active
+
+
 def get_all_algorithms(vertices, edges):
     return [
         DijkstraSolver(vertices, edges),
@@ -0,0 +1,377 @@
+"""
+Headless benchmark for the solvers, diagnostics and frame rendering.
+
+Builds graph families of increasing size, times every NP solver and graph
+algorithm, GraphDiagnostics.update and one rendered frame, and writes the
+timings as JSON so runs on different commits can be compared:
+
+    python benchmark.py --sizes 8 16 32 --output bench.json
+
+Runs without a display through SDL's dummy video driver.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import argparse
+import json
+import math
+import pickle
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import pygame
+
+SCREEN_SIZE = (1280, 800)
+pygame.display.init()
+pygame.display.set_mode(SCREEN_SIZE)
+
+from algorithms import get_all_algorithms, solve_algorithm
+from bitset_engines import SearchTooLarge
+from config import DEBUG_FONT
+from csr import GraphSnapshot
+from diagnostics import GraphDiagnostics
+from graph import Vertex, Edge, duplicate_graph, draw_graph_points
+from graph_io import save_graph, load_graph
+from math_text import clear_math_surface_cache, math_surface_cache_stats
+from np_problems import get_all_problems, solve_problem
+from scene import SceneLayer, graph_render_key, detail_level, LOD_POINTS, LOD_FULL
+from utils import TrackedList, EdgeList
+
+FAMILIES = ["path", "cycle", "grid", "gnp", "complete", "bipartite", "duplicate"]
+DEFAULT_SIZES = [8, 16, 32, 64]
+
+# Cold-start import budgets in seconds, measured in a fresh interpreter. The core
+# (graph model, solvers, diagnostics) must also load without pygame or matplotlib.
+CORE_MODULES = ["config", "csr", "bitset_engines", "flow", "utils", "graph", "algorithms", "np_problems",
+                "diagnostics", "physics", "spatial_hash", "solver_pool"]
+STARTUP_TARGETS = {"core": 0.25, "ui": 1.5}
+
+
+# ---------- graph families ----------
+
+def _circle_layout(n):
+    cx, cy = SCREEN_SIZE[0] / 2, SCREEN_SIZE[1] / 2
+    r = min(cx, cy) - 60
+    return [[cx + r * math.cos(2 * math.pi * i / n), cy + r * math.sin(2 * math.pi * i / n)] for i in range(n)]
+
+
+def _make_graph(positions, pairs, rng=None):
+    vertices = TrackedList(Vertex(pos, f"V_{i}") for i, pos in enumerate(positions))
+    edges = EdgeList(Edge(vertices[i], vertices[j], str(rng.randint(1, 9)) if rng else "1") for i, j in pairs)
+    return vertices, edges
+
+
+def build_family(family, n, rng, p=0.15):
+    """Return (vertices, edges) of the named family with about `n` vertices."""
+    if family == "path":
+        return _make_graph(_circle_layout(n), [(i, i + 1) for i in range(n - 1)])
+    if family == "cycle":
+        return _make_graph(_circle_layout(n), [(i, (i + 1) % n) for i in range(n)])
+    if family == "grid":
+        side = max(2, round(math.sqrt(n)))
+        step = min(SCREEN_SIZE) / (side + 1)
+        positions = [[step * (c + 1), step * (r + 1)] for r in range(side) for c in range(side)]
+        pairs = [(r * side + c, r * side + c + 1) for r in range(side) for c in range(side - 1)]
+        pairs += [(r * side + c, (r + 1) * side + c) for r in range(side - 1) for c in range(side)]
+        return _make_graph(positions, pairs)
+    if family == "gnp":
+        pairs = [(i, j) for i in range(n) for j in range(i + 1, n) if rng.random() < p]
+        return _make_graph(_circle_layout(n), pairs, rng)
+    if family == "complete":
+        return _make_graph(_circle_layout(n), [(i, j) for i in range(n) for j in range(i + 1, n)])
+    if family == "bipartite":
+        half = n // 2
+        positions = [[300, 40 + 700 * i / max(1, half - 1)] for i in range(half)]
+        positions += [[900, 40 + 700 * i / max(1, n - half - 1)] for i in range(n - half)]
+        return _make_graph(positions, [(i, j) for i in range(half) for j in range(half, n) if rng.random() < 0.5])
+    if family == "duplicate":
+        # A 5-vertex "house" replicated with the Duplicate button's layout logic
+        base = [[40, 80], [100, 80], [40, 140], [100, 140], [70, 40]]
+        vertices, edges = _make_graph(base, [(0, 1), (0, 2), (1, 3), (2, 3), (0, 4), (1, 4)])
+        duplicate_graph(vertices, edges, (0, 0, *SCREEN_SIZE), times=max(0, n // len(base) - 1))
+        return vertices, edges
+    raise ValueError(f"unknown graph family: {family}")
+
+
+# ---------- timing ----------
+
+def _fresh_snapshot(snapshot):
+    """Copy of `snapshot` without its CSR cache, as a worker process would receive it."""
+    return pickle.loads(pickle.dumps(snapshot))
+
+
+def _time_solver(problem_cls, snapshot, k, directed, timeout):
+    cancel_event = threading.Event()
+    timer = threading.Timer(timeout, cancel_event.set)
+    snapshot = _fresh_snapshot(snapshot)
+    timer.start()
+    start = time.perf_counter()
+    try:
+        out = solve_problem(problem_cls, snapshot, k, directed, cancel_event)
+    except SearchTooLarge:
+        out = None  # gave up at its node limit, like a timeout
+    elapsed = time.perf_counter() - start
+    timer.cancel()
+    return elapsed, out
+
+
+def _time_algorithm(algorithm_cls, snapshot, source, target, directed):
+    snapshot = _fresh_snapshot(snapshot)
+    start = time.perf_counter()
+    out = solve_algorithm(algorithm_cls, snapshot, source, target, directed, None)
+    return time.perf_counter() - start, out
+
+
+def _time_diagnostics(vertices, edges, directed):
+    diagnostics = GraphDiagnostics(vertices, edges)
+    vertices.touch()  # new graph version: rebuilds the snapshot and CSR like an edit would
+    start = time.perf_counter()
+    diagnostics.update(directed=directed)
+    return time.perf_counter() - start, diagnostics
+
+
+def render_frame(screen, scene, vertices, edges, problems, algorithms, diagnostics, k, directed):
+    """Draw what main() draws each frame: the solver panels, diagnostics and the graph."""
+    screen.fill((30, 30, 30))
+    mouse_pos = (-1, -1)
+    y = 67
+    for problem in problems:
+        y, _, _ = problem.render_debug(screen, DEBUG_FONT, k, y, mouse_pos, directed)
+    y = screen.get_height() - len(algorithms) * 20 - 15
+    for alg in algorithms:
+        y, _, _ = alg.render_debug(screen, DEBUG_FONT, y, mouse_pos, directed)
+    diagnostics.update(directed=directed)
+    diagnostics.render(screen, DEBUG_FONT, mouse_pos)
+
+    def draw_graph(surface):
+        level = detail_level(1.0, vertices, (0, 0, *surface.get_size()))
+        if level == LOD_POINTS:
+            draw_graph_points(surface, vertices, edges)
+            return
+        for edge in edges:
+            offset = math.pi / 18 if directed and edges.has_opposite(edge) else 0
+            edge.draw(surface, directed=directed, offset_angle=offset)
+        for vertex in vertices:
+            vertex.draw(surface, label=level == LOD_FULL)
+
+    key = graph_render_key(vertices, edges, directed, False, None, None, None, None, None)
+    scene.render(screen.get_size(), key, draw_graph)
+    screen.blit(scene.surface, (0, 0))
+
+
+def _settle(vertices, edges, problems, algorithms, problem_outs, algorithm_outs, source, target, k, directed):
+    """Install the benchmarked results so rendering shows them instead of resubmitting work."""
+    version = problems[0].graph_state.version()
+    for problem, out in zip(problems, problem_outs):
+        problem._last_state_key = (version, k, directed)
+        problem.needs_update = False
+        if out is not None:
+            problem._publish(problem._run_id, out)
+    for alg, out in zip(algorithms, algorithm_outs):
+        alg.source, alg.target = source, target
+        alg._last_state_key = (version, source, target, directed)
+        alg._publish(alg._run_id, out)
+
+
+def _record(results, family, n, m, directed, group, name, runs, timed_out=False):
+    entry = {
+        "family": family, "n": n, "m": m, "directed": directed,
+        "group": group, "name": name,
+        "median": statistics.median(runs) if runs else None,
+        "min": min(runs) if runs else None,
+        "runs": runs,
+        "timed_out": timed_out,
+    }
+    results.append(entry)
+    status = "timeout" if timed_out else f"{entry['median'] * 1000:9.2f} ms"
+    print(f"{family:>10} n={n:<4} m={m:<5} {group:<11} {name:<16} {status}")
+
+
+def run_benchmarks(families, sizes, repeat=3, timeout=5.0, k=3, directed=False, seed=0, frames=True):
+    results = []
+    screen = pygame.display.get_surface()
+    for family in families:
+        given_up = set()  # solvers that timed out stay skipped at larger sizes
+        for size in sizes:
+            rng = random.Random(f"{seed}-{family}-{size}")
+            vertices, edges = build_family(family, size, rng)
+            n, m = len(vertices), len(edges)
+            snapshot = GraphSnapshot.from_graph(vertices, edges)
+            source, target = (vertices[0].name, vertices[-1].name) if vertices else (None, None)
+
+            problems = get_all_problems(vertices, edges)
+            problem_outs = []
+            for problem in problems:
+                out = None
+                if problem.name in given_up:
+                    _record(results, family, n, m, directed, "solver", problem.name, [], timed_out=True)
+                    problem_outs.append(out)
+                    continue
+                runs = []
+                for _ in range(repeat):
+                    elapsed, out = _time_solver(type(problem), snapshot, k, directed, timeout)
+                    if out is None:
+                        given_up.add(problem.name)
+                        break
+                    runs.append(elapsed)
+                _record(results, family, n, m, directed, "solver", problem.name, runs,
+                        timed_out=problem.name in given_up)
+                problem_outs.append(out)
+
+            algorithms = get_all_algorithms(vertices, edges)
+            algorithm_outs = []
+            for alg in algorithms:
+                runs = []
+                for _ in range(repeat):
+                    elapsed, out = _time_algorithm(type(alg), snapshot, source, target, directed)
+                    runs.append(elapsed)
+                _record(results, family, n, m, directed, "algorithm", alg.name, runs)
+                algorithm_outs.append(out)
+
+            runs = []
+            for _ in range(repeat):
+                elapsed, diagnostics = _time_diagnostics(vertices, edges, directed)
+                runs.append(elapsed)
+            _record(results, family, n, m, directed, "diagnostics", "update", runs)
+
+            if frames:
+                _settle(vertices, edges, problems, algorithms, problem_outs, algorithm_outs,
+                        source, target, k, directed)
+                clear_math_surface_cache()
+                scene = SceneLayer()
+                start = time.perf_counter()
+                render_frame(screen, scene, vertices, edges, problems, algorithms, diagnostics, k, directed)
+                _record(results, family, n, m, directed, "frame", "cold", [time.perf_counter() - start])
+                runs = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    render_frame(screen, scene, vertices, edges, problems, algorithms, diagnostics, k, directed)
+                    runs.append(time.perf_counter() - start)
+                _record(results, family, n, m, directed, "frame", "warm", runs)
+    return results
+
+
+def measure_startup(repeat=3):
+    """Time importing the core modules and the full UI (main) in fresh interpreters."""
+    probes = {
+        "core": "import " + ", ".join(CORE_MODULES),
+        "ui": "import main",
+    }
+    results = []
+    for name, statement in probes.items():
+        code = ("import sys, time\n"
+                "start = time.perf_counter()\n"
+                f"{statement}\n"
+                "print(time.perf_counter() - start, 'pygame' in sys.modules, 'matplotlib' in sys.modules)")
+        runs, heavy = [], []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)), timeout=120)
+            if out.returncode != 0:
+                print(f"[ERROR] Startup probe '{name}' failed: {out.stderr.strip().splitlines()[-1:]}")
+                break
+            seconds, pygame_loaded, matplotlib_loaded = out.stdout.split()[-3:]
+            runs.append(float(seconds))
+            heavy = [module for module, loaded in (("pygame", pygame_loaded), ("matplotlib", matplotlib_loaded))
+                     if loaded == "True"]
+        median = statistics.median(runs) if runs else None
+        entry = {
+            "group": "startup", "name": name, "median": median, "min": min(runs) if runs else None,
+            "runs": runs, "target": STARTUP_TARGETS[name], "heavy_modules": heavy,
+            "within_target": median is not None and median <= STARTUP_TARGETS[name]
+                             and not (name == "core" and heavy),
+        }
+        results.append(entry)
+        status = "n/a" if median is None else f"{median * 1000:9.2f} ms"
+        print(f"{'startup':>10} {name:<29} {status} (target {STARTUP_TARGETS[name] * 1000:.0f} ms)")
+        if not entry["within_target"]:
+            print(f"[WARN] Startup '{name}' misses its target" + (f"; loads {', '.join(heavy)}" if heavy else ""))
+    return results
+
+
+def measure_graph_io(edge_count, repeat=3, seed=0):
+    """Time save_graph/load_graph in the binary and JSON formats on a random graph with `edge_count` edges."""
+    rng = random.Random(seed)
+    n = max(2, edge_count // 5)
+    vertices = TrackedList(Vertex((rng.uniform(0, 2000), rng.uniform(0, 2000)), f"v_{i}") for i in range(n))
+    edges = EdgeList(Edge(vertices[rng.randrange(n)], vertices[rng.randrange(n)], str(rng.randint(1, 9)))
+                     for _ in range(edge_count))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for extension in (".gtvg", ".json"):
+            filename = os.path.join(tmp, "graph" + extension)
+            save_runs, load_runs = [], []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                save_graph(vertices, edges, filename=filename)
+                save_runs.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                load_graph(filename, TrackedList(), EdgeList())
+                load_runs.append(time.perf_counter() - start)
+            _record(results, "random", n, edge_count, False, "io", "save " + extension, save_runs)
+            _record(results, "random", n, edge_count, False, "io", "load " + extension, load_runs)
+    return results
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark for the graph solvers and renderer.")
+    parser.add_argument("--families", nargs="+", choices=FAMILIES, default=FAMILIES)
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per measurement")
+    parser.add_argument("--timeout", type=float, default=5.0, help="seconds before a solver run is cancelled")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--directed", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-frames", action="store_true", help="skip the rendering benchmark")
+    parser.add_argument("--no-startup", action="store_true", help="skip the cold-start import measurement")
+    parser.add_argument("--io-edges", type=int, default=100_000,
+                        help="edges in the save/load benchmark graph (0 to skip it)")
+    parser.add_argument("--output", default="benchmark.json", help="JSON output path ('-' for stdout)")
+    args = parser.parse_args()
+
+    results = [] if args.no_startup else measure_startup(args.repeat)
+    results += run_benchmarks(args.families, args.sizes, repeat=args.repeat, timeout=args.timeout,
+                              k=args.k, directed=args.directed, seed=args.seed, frames=not args.no_frames)
+    if args.io_edges:
+        results += measure_graph_io(args.io_edges, repeat=args.repeat, seed=args.seed)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "args": vars(args),
+            "math_surface_cache": math_surface_cache_stats(),
+        },
+        "results": results,
+    }
+    if args.output == "-":
+        print(json.dumps(report, indent=2))
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Wrote {len(results)} measurements to {args.output}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
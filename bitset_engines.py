@@ -0,0 +1,665 @@
+"""
+Exact search engines over integer bitmask adjacency.
+
+Vertex `i` is bit `1 << i`; `masks[i]` is the bitmask of its neighbors
+(see CSRGraph.neighbor_masks). Every engine returns vertex ids and accepts
+an optional threading.Event; once it is set the search raises SolverCancelled.
+"""
+
+
+class SolverCancelled(Exception):
+    """Raised inside a search whose cancel_event was set; the caller drops the result."""
+
+
+class SearchTooLarge(Exception):
+    """
+    Raised by a search that used up its node limit. `best` is the best
+    solution found so far (vertex ids) and `lower_bound` what the optimum
+    is known to be at least, so callers can still answer some questions.
+    """
+
+    def __init__(self, node_limit, best, lower_bound):
+        # Every field goes into args, which is what pickling passes back to __init__
+        super().__init__(node_limit, best, lower_bound)
+        self.node_limit = node_limit
+        self.best = best
+        self.lower_bound = lower_bound
+
+    def __str__(self):
+        return f"search exceeded {self.node_limit} nodes"
+
+
+def check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise SolverCancelled()
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def iter_bits(mask):
+    """Yield the ids of the set bits of `mask`, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def greedy_color_bound(p, masks):
+    """Colors used by a greedy coloring of the vertices in `p`; no clique inside `p` is larger."""
+    colors = 0
+    while p:
+        colors += 1
+        q = p
+        while q:
+            low = q & -q
+            v = low.bit_length() - 1
+            p ^= low
+            q = (q ^ low) & ~masks[v]
+    return colors
+
+
+def max_clique(masks, cancel_event=None):
+    """
+    Maximum clique by Bron–Kerbosch with Tomita pivoting. Each branch is cut
+    when |R| plus a greedy-coloring bound on P cannot beat the best clique.
+    Returns the clique as a sorted list of vertex ids.
+    """
+    best = [0, 0]  # size, mask
+
+    def expand(r, r_size, p, x):
+        check_cancelled(cancel_event)
+        if not p:
+            if r_size > best[0]:
+                best[0], best[1] = r_size, r
+            return
+        if r_size + greedy_color_bound(p, masks) <= best[0]:
+            return
+
+        # Pivot on the vertex covering most of P; only its non-neighbors need branching
+        pivot = max(iter_bits(p | x), key=lambda u: popcount(p & masks[u]))
+        for v in iter_bits(p & ~masks[pivot]):
+            bit = 1 << v
+            expand(r | bit, r_size + 1, p & masks[v], x & masks[v])
+            p &= ~bit
+            x |= bit
+            if r_size + popcount(p) <= best[0]:
+                return
+
+    expand(0, 0, (1 << len(masks)) - 1, 0)
+    return list(iter_bits(best[1]))
+
+
+# Backtracking steps tried before building the Held–Karp table.
+DFS_PROBE_STEPS = 2000
+
+# Largest graph solved with the Held–Karp table; it holds about n * 2**n / 2
+# bytes while solving (96 MiB at 23 vertices).
+HELD_KARP_MAX_VERTICES = 23
+
+
+def predecessor_masks(masks):
+    """Transpose of `masks`: bit u of the result's entry v is set when masks[u] has bit v."""
+    preds = [0] * len(masks)
+    for u, m in enumerate(masks):
+        bit = 1 << u
+        for v in iter_bits(m):
+            preds[v] |= bit
+    return preds
+
+
+def _weakly_connected(masks, preds):
+    n = len(masks)
+    seen, frontier = 1, 1
+    while frontier:
+        grown = 0
+        for v in iter_bits(frontier):
+            grown |= masks[v] | preds[v]
+        frontier = grown & ~seen
+        seen |= frontier
+    return seen == (1 << n) - 1
+
+
+def _masks_without(u, n):
+    """2**n-bit set of the vertex masks that do not contain vertex u."""
+    block = 1 << u
+    pattern, length = (1 << block) - 1, 2 * block
+    while length < 1 << n:
+        pattern |= pattern << length
+        length *= 2
+    return pattern
+
+
+def hamiltonian_path(masks, cancel_event=None):
+    """
+    Hamiltonian path over directed bitmask adjacency (pass symmetric masks
+    for undirected graphs). Returns the path as a list of vertex ids, or []
+    when there is none.
+
+    Graphs of up to HELD_KARP_MAX_VERTICES vertices use an iterative
+    Held–Karp DP with one bit per (mask, vertex): `ends[v]` is a 2**n-bit
+    integer whose bit `mask` says some path covering exactly `mask` ends at
+    v. Paths grow one vertex per layer, so a whole layer advances with a few
+    big-integer operations per arc: the masks ending at v that avoid u,
+    shifted by 2**u, end at u one layer later. The path is rebuilt by walking
+    back through predecessors; the table is freed when the solve returns.
+    Larger graphs fall back to a depth-first search that keeps no table.
+    Smaller ones try that search first with a step budget, since dense
+    graphs usually have a path it finds at once.
+    """
+    n = len(masks)
+    if n == 0:
+        return []
+    if n == 1:
+        return [0]
+    preds = predecessor_masks(masks)
+    if not _weakly_connected(masks, preds):
+        return []
+    if n > HELD_KARP_MAX_VERTICES:
+        return _hamiltonian_path_dfs(masks, preds, cancel_event)
+    path = _hamiltonian_path_dfs(masks, preds, cancel_event, budget=DFS_PROBE_STEPS)
+    if path is not None:
+        return path
+
+    without = [_masks_without(u, n) for u in range(n)]
+    layer = [1 << (1 << v) for v in range(n)]  # single-vertex paths
+    ends = layer[:]
+    for _ in range(n - 1):
+        check_cancelled(cancel_event)
+        grown = []
+        for u in range(n):
+            reach = 0
+            for v in iter_bits(preds[u]):
+                reach |= layer[v]
+            grown.append((reach & without[u]) << (1 << u))
+        layer = grown
+        if not any(layer):
+            return []
+        for u in range(n):
+            ends[u] |= layer[u]
+
+    # Walk back: the vertex before v ends a path over the remaining mask
+    v = next(u for u in range(n) if layer[u])
+    mask = (1 << n) - 1
+    path = [v]
+    while mask != 1 << v:
+        mask ^= 1 << v
+        v = next(u for u in iter_bits(preds[v] & mask) if ends[u] >> mask & 1)
+        path.append(v)
+    path.reverse()
+    return path
+
+
+def _hamiltonian_path_dfs(masks, preds, cancel_event, budget=None):
+    """
+    Iterative backtracking, trying low-degree starts and the neighbor with
+    fewest exits first. Returns None once `budget` steps ran out undecided.
+    """
+    n = len(masks)
+    full = (1 << n) - 1
+    degree = [popcount(masks[v] | preds[v]) for v in range(n)]
+    for start in sorted(range(n), key=degree.__getitem__):
+        path = [start]
+        visited = 1 << start
+        # stack[i] holds the untried successors of path[i]
+        stack = [_ordered_exits(masks, start, visited)]
+        while stack:
+            check_cancelled(cancel_event)
+            if budget is not None:
+                budget -= 1
+                if budget < 0:
+                    return None
+            if visited == full:
+                return path
+            if not stack[-1]:
+                stack.pop()
+                visited ^= 1 << path.pop()
+                continue
+            u = stack[-1].pop()
+            path.append(u)
+            visited |= 1 << u
+            stack.append(_ordered_exits(masks, u, visited))
+    return []
+
+
+def _ordered_exits(masks, v, visited):
+    # Reversed so that list.pop() yields the most constrained neighbor first
+    exits = list(iter_bits(masks[v] & ~visited))
+    exits.sort(key=lambda u: popcount(masks[u] & ~visited), reverse=True)
+    return exits
+
+
+def _most_saturated(masks, forbidden, free):
+    """DSATUR choice: the vertex in `free` with most distinct neighbor colors, then most free neighbors; -1 if none."""
+    best, best_key = -1, None
+    for u in iter_bits(free):
+        key = (popcount(forbidden[u]), popcount(masks[u] & free))
+        if best_key is None or key > best_key:
+            best, best_key = u, key
+    return best
+
+
+def _dsatur_greedy(masks):
+    """Greedy DSATUR coloring; returns a color per vertex."""
+    n = len(masks)
+    color = [-1] * n
+    forbidden = [0] * n
+    free = (1 << n) - 1
+    while free:
+        v = _most_saturated(masks, forbidden, free)
+        c = (~forbidden[v] & (forbidden[v] + 1)).bit_length() - 1  # lowest color not taken
+        color[v] = c
+        free ^= 1 << v
+        for u in iter_bits(masks[v] & free):
+            forbidden[u] |= 1 << c
+    return color
+
+
+def chromatic_coloring(masks, cancel_event=None):
+    """
+    Minimum coloring by DSATUR branch and bound. `forbidden[v]` is the bitmask
+    of colors already taken by v's neighbors. A maximum clique is colored
+    0..ω-1 up front, which is both the lower bound and the symmetry break;
+    greedy DSATUR gives the first upper bound. Each branch colors the most
+    saturated vertex with a color already in use or with a single new one,
+    since every unused color is interchangeable, and only while fewer colors
+    than the best coloring so far are needed. Returns a color per vertex.
+    """
+    n = len(masks)
+    if n == 0:
+        return []
+    clique = max_clique(masks, cancel_event)
+    lower = len(clique)
+    best = _dsatur_greedy(masks)
+    upper = max(best) + 1
+    if upper == lower:
+        return best
+
+    color = [-1] * n
+    forbidden = [0] * n
+    free = (1 << n) - 1
+
+    def assign(v, c):
+        """Color v with c; returns the neighbors for which c became forbidden."""
+        nonlocal free
+        color[v] = c
+        free ^= 1 << v
+        bit = 1 << c
+        changed = []
+        for u in iter_bits(masks[v] & free):
+            if not forbidden[u] & bit:
+                forbidden[u] |= bit
+                changed.append(u)
+        return changed
+
+    for c, v in enumerate(clique):
+        assign(v, c)
+    used = lower
+
+    def candidates(v):
+        # Reversed so that list.pop() tries the lowest color first
+        return [c for c in range(min(used + 1, upper - 1) - 1, -1, -1) if not forbidden[v] >> c & 1]
+
+    # Frames of [vertex, untried colors, neighbors changed by its current color, colors used before it]
+    v = _most_saturated(masks, forbidden, free)
+    if v < 0:
+        return color
+    stack = [[v, candidates(v), None, used]]
+    while stack:
+        check_cancelled(cancel_event)
+        frame = stack[-1]
+        v, untried, changed, used_before = frame
+        if changed is not None:
+            # Undo the color tried last
+            bit = 1 << color[v]
+            for u in changed:
+                forbidden[u] &= ~bit
+            color[v] = -1
+            free |= 1 << v
+            used = used_before
+            frame[2] = None
+        while untried and max(used, untried[-1] + 1) >= upper:
+            untried.pop()
+        if not untried:
+            stack.pop()
+            continue
+
+        c = untried.pop()
+        frame[2] = assign(v, c)
+        used = max(used, c + 1)
+        u = _most_saturated(masks, forbidden, free)
+        if u < 0:
+            best, upper = color[:], used
+            if upper == lower:
+                break
+            continue
+        stack.append([u, candidates(u), None, used])
+    return best
+
+
+def _matching_size(masks, alive):
+    """Size of a greedy maximal matching inside `alive`; every vertex cover needs at least this many vertices."""
+    free = alive
+    size = 0
+    for v in iter_bits(alive):
+        if free >> v & 1:
+            partners = masks[v] & free
+            if partners:
+                free &= ~((1 << v) | (partners & -partners))
+                size += 1
+    return size
+
+
+def vertex_cover(masks, k, forced=0, cancel_event=None):
+    """
+    Vertex cover of at most `k` vertices by kernelization and a bounded
+    search tree. `forced` is a mask of vertices that must be in the cover
+    (those with self-loops). Before every branch the graph is reduced:
+    isolated vertices are dropped, the neighbor of a degree-1 vertex is
+    taken, so is any vertex of degree > k (Buss), and both neighbors of a
+    degree-2 vertex in a triangle. A reduced graph with more than k² edges
+    or a matching larger than k is rejected. Branching is on a degree-2
+    vertex, taking both neighbors or all of their neighbors, else on a
+    maximum-degree vertex, taking it or its whole neighborhood.
+    Returns the cover as a sorted list of vertex ids, or None.
+    """
+
+    def solve(alive, k):
+        check_cancelled(cancel_event)
+        taken = 0
+        reduced = True
+        while reduced:
+            reduced = False
+            for v in iter_bits(alive):
+                bit = 1 << v
+                if not alive & bit:
+                    continue
+                nbrs = masks[v] & alive
+                degree = popcount(nbrs)
+                if degree == 0:
+                    alive ^= bit
+                    continue
+                if degree == 1:
+                    take = nbrs
+                elif degree > k:
+                    take = bit
+                elif degree == 2 and masks[nbrs.bit_length() - 1] & nbrs & -nbrs:
+                    take = nbrs
+                else:
+                    continue
+                taken |= take
+                alive &= ~take
+                k -= popcount(take)
+                if k < 0:
+                    return None
+                reduced = True
+
+        if not alive:
+            return taken
+        degrees = {v: popcount(masks[v] & alive) for v in iter_bits(alive)}
+        if sum(degrees.values()) > 2 * k * k or _matching_size(masks, alive) > k:
+            return None
+
+        v = min(degrees, key=degrees.get)
+        nbrs = masks[v] & alive
+        if degrees[v] == 2:
+            a, b = iter_bits(nbrs)
+            branches = (nbrs, (masks[a] | masks[b]) & alive)
+        else:
+            v = max(degrees, key=degrees.get)
+            branches = (1 << v, nbrs)
+        for take in branches:
+            size = popcount(take)
+            if size <= k:
+                rest = solve(alive & ~take, k - size)
+                if rest is not None:
+                    return taken | take | rest
+        return None
+
+    k -= popcount(forced)
+    if k < 0:
+        return None
+    cover = solve(((1 << len(masks)) - 1) & ~forced, k)
+    return None if cover is None else list(iter_bits(cover | forced))
+
+
+def _cover_lower_bound(uncovered, allowed, closed, covers):
+    """
+    Lower bound on the sets from `allowed` still needed: the larger of a
+    counting bound (fewest sets whose sizes could add up to the uncovered
+    count) and a packing bound (uncovered vertices with pairwise disjoint
+    candidate sets each need their own set).
+    """
+    need = popcount(uncovered)
+    gains = sorted((popcount(closed[v] & uncovered) for v in iter_bits(allowed)), reverse=True)
+    counting = 0
+    for gain in gains:
+        if need <= 0 or not gain:
+            break
+        need -= gain
+        counting += 1
+    if need > 0:
+        return len(closed) + 1
+
+    packing, used = 0, 0
+    for opts in sorted((covers[u] & allowed for u in iter_bits(uncovered)), key=popcount):
+        if not opts & used:
+            packing += 1
+            used |= opts
+    return max(counting, packing)
+
+
+def min_dominating_set(masks, cancel_event=None, node_limit=None):
+    """
+    Minimum dominating set as a set cover: vertex v covers its closed
+    neighborhood `masks[v] | 1 << v` (out-neighbors for directed masks).
+    A candidate whose still-uncovered neighborhood is contained in another
+    candidate's is dropped, so a leaf's neighbor is forced once the leaf
+    itself is dominated away. Greedy cover gives the first upper bound.
+    Each branch first takes every vertex that is the last candidate able to
+    cover some vertex, is cut when the counting and packing bounds cannot
+    beat the best cover, and otherwise branches over the candidates of the
+    hardest-to-cover vertex. Returns the set as a sorted list of vertex ids;
+    after `node_limit` search nodes it raises SearchTooLarge instead.
+    """
+    n = len(masks)
+    closed = [masks[v] | 1 << v for v in range(n)]
+    preds = predecessor_masks(masks)
+    candidates = (1 << n) - 1
+    for v in range(n):
+        for w in iter_bits(preds[v]):
+            if not closed[v] & ~closed[w] and (closed[v] != closed[w] or w < v):
+                candidates &= ~(1 << v)
+                break
+    covers = [(preds[u] | 1 << u) & candidates for u in range(n)]
+
+    # Greedy cover for the first upper bound
+    uncovered, greedy = (1 << n) - 1, 0
+    while uncovered:
+        v = max(iter_bits(candidates), key=lambda v: popcount(closed[v] & uncovered))
+        greedy |= 1 << v
+        uncovered &= ~closed[v]
+    best = [popcount(greedy), greedy]
+    root_bound = _cover_lower_bound((1 << n) - 1, candidates, closed, covers)
+    nodes = 0
+
+    def dominated(v, uncovered, allowed):
+        gain = closed[v] & uncovered
+        if not gain:
+            return True
+        # A candidate covering all of `gain` also covers its lowest vertex
+        for w in iter_bits(covers[(gain & -gain).bit_length() - 1] & allowed):
+            other = closed[w] & uncovered
+            if w != v and not gain & ~other and (gain != other or w < v):
+                return True
+        return False
+
+    def search(uncovered, chosen, size, allowed):
+        nonlocal nodes
+        check_cancelled(cancel_event)
+        nodes += 1
+        if node_limit is not None and nodes > node_limit:
+            raise SearchTooLarge(node_limit, list(iter_bits(best[1])), root_bound)
+        while True:
+            if not uncovered:
+                if size < best[0]:
+                    best[0], best[1] = size, chosen
+                return
+            # Drop candidates whose remaining coverage another candidate contains
+            for v in iter_bits(allowed):
+                if dominated(v, uncovered, allowed):
+                    allowed &= ~(1 << v)
+
+            # The uncovered vertex with fewest remaining candidates
+            hardest, options = -1, 0
+            for u in iter_bits(uncovered):
+                opts = covers[u] & allowed
+                if not opts:
+                    return
+                if hardest < 0 or popcount(opts) < popcount(options):
+                    hardest, options = u, opts
+                    if not opts & (opts - 1):
+                        break
+            if options & (options - 1):
+                break
+            # Forced: the only candidate left for `hardest`
+            chosen |= options
+            size += 1
+            allowed &= ~options
+            uncovered &= ~closed[options.bit_length() - 1]
+            if size >= best[0]:
+                return
+
+        if size + _cover_lower_bound(uncovered, allowed, closed, covers) >= best[0]:
+            return
+        for v in sorted(iter_bits(options), key=lambda v: popcount(closed[v] & uncovered), reverse=True):
+            bit = 1 << v
+            allowed &= ~bit
+            search(uncovered & ~closed[v], chosen | bit, size + 1, allowed)
+            if best[0] <= root_bound:
+                return
+
+    if best[0] > root_bound:
+        search((1 << n) - 1, 0, 0, candidates)
+    return list(iter_bits(best[1]))
+
+
+def _clique_cover_bound(p, masks):
+    """Cliques in a greedy clique cover of `p`; no independent set inside `p` is larger."""
+    cliques = 0
+    while p:
+        cliques += 1
+        low = p & -p
+        p ^= low
+        q = p & masks[low.bit_length() - 1]
+        while q:
+            low = q & -q
+            p ^= low
+            q = (q ^ low) & masks[low.bit_length() - 1]
+    return cliques
+
+
+def _mirrors(v, p, masks):
+    """Vertices u at distance two from v in `p` for which N(v) \\ N(u) is a clique."""
+    nbrs = masks[v] & p
+    second = 0
+    for x in iter_bits(nbrs):
+        second |= masks[x]
+    mirrors = 0
+    for u in iter_bits(second & p & ~nbrs & ~(1 << v)):
+        rest = nbrs & ~masks[u]
+        if all(not rest & ~masks[x] & ~(1 << x) for x in iter_bits(rest)):
+            mirrors |= 1 << u
+    return mirrors
+
+
+def max_independent_set(masks, cancel_event=None):
+    """
+    Maximum independent set by branch and reduce. Each branch first reduces
+    the graph: vertices of degree 0 or 1 are taken, so is a degree-2 vertex
+    whose neighbors are adjacent; a degree-2 vertex with non-adjacent
+    neighbors a, b is folded (v, a, b become one vertex adjacent to
+    N(a) ∪ N(b), and α grows by one); and a vertex u is dropped when a
+    neighbor v has N[v] ⊆ N[u]. A branch is cut when a greedy clique cover
+    shows it cannot beat the best set so far. Otherwise it branches on a
+    maximum-degree vertex v: take v, or drop v together with its mirrors.
+    Folded vertices get fresh ids past the end of `masks` and are unfolded
+    when the solution is returned. Returns the set as a sorted list of vertex ids.
+    """
+    masks = list(masks)  # folding appends and edits entries
+
+    def solve(p, floor):
+        """(size, mask) of a maximum independent set in `p` if larger than `floor`, else None."""
+        check_cancelled(cancel_event)
+        taken, size = 0, 0
+        folds = []  # (v, a, b, folded vertex, its neighbors), undone on return
+        try:
+            reduced = True
+            while reduced:
+                reduced = False
+                for v in iter_bits(p):
+                    bit = 1 << v
+                    if not p & bit:
+                        continue
+                    nbrs = masks[v] & p
+                    degree = popcount(nbrs)
+                    if degree == 2:
+                        a, b = iter_bits(nbrs)
+                        if not masks[a] >> b & 1:
+                            w = len(masks)
+                            joined = (masks[a] | masks[b]) & p & ~(bit | nbrs)
+                            masks.append(joined)
+                            for x in iter_bits(joined):
+                                masks[x] |= 1 << w
+                            folds.append((v, a, b, w, joined))
+                            p = (p & ~(bit | nbrs)) | 1 << w
+                            size += 1
+                            reduced = True
+                            continue
+                    if degree <= 2:
+                        taken |= bit
+                        size += 1
+                        p &= ~(bit | nbrs)
+                        reduced = True
+                        continue
+                    # Domination: a neighbor whose closed neighborhood contains v's is never needed
+                    closed = nbrs | bit
+                    for u in iter_bits(nbrs):
+                        if not closed & ~(masks[u] | 1 << u):
+                            p &= ~(1 << u)
+                            reduced = True
+                            break
+
+            best = None
+            if not p:
+                if size > floor:
+                    best = (size, taken)
+            elif size + _clique_cover_bound(p, masks) > floor:
+                v = max(iter_bits(p), key=lambda u: popcount(masks[u] & p))
+                bit = 1 << v
+                with_v = solve(p & ~(bit | masks[v]), floor - size - 1)
+                if with_v is not None:
+                    best = (size + 1 + with_v[0], taken | bit | with_v[1])
+                    floor = best[0]
+                without_v = solve(p & ~(bit | _mirrors(v, p, masks)), floor - size)
+                if without_v is not None:
+                    best = (size + without_v[0], taken | without_v[1])
+
+            if best is None:
+                return None
+            found, mask = best
+            for v, a, b, w, _ in reversed(folds):
+                if mask >> w & 1:
+                    mask = (mask ^ (1 << w)) | 1 << a | 1 << b
+                else:
+                    mask |= 1 << v
+            return found, mask
+        finally:
+            for v, a, b, w, joined in reversed(folds):
+                for x in iter_bits(joined):
+                    masks[x] &= ~(1 << w)
+                masks.pop()
+
+    best = solve((1 << len(masks)) - 1, -1)
+    return list(iter_bits(best[1]))
@@ -1,7 +1,3 @@
-import pygame
-
-pygame.font.init()
-
 # Colors
 BACKGROUND_COLOR = (30, 30, 30)
 VERTEX_COLOR = (100, 149, 237)
@@ -25,42 +21,94 @@ EDGE_CLICK_RADIUS = 15
 VERTEX_OUTLINE_WIDTH = 4
 DOUBLE_CLICK_TIME = 200
 
-# Fonts
-FONT = pygame.font.SysFont("Segoe UI", 13, bold=True)
-INPUT_FONT = pygame.font.SysFont("consolas", 16, bold=True)
-DEBUG_FONT = pygame.font.SysFont("consolas", 16)
+# Serif faces tried in order for vertex/weight labels drawn without matplotlib
+MATH_LABEL_FONTS = "cambriamath,cambria,timesnewroman,dejavuserif,liberationserif"
+
+# Fonts and button rects need pygame, so they are built on first access
+# (e.g. `from config import FONT`). Importing config alone stays pygame-free,
+# which keeps the graph model, solvers and diagnostics import-light.
+_ui = {}
+
 
 def next_button(label, x, y, padding=7, height=32):
     """Create a button rect based on the label, starting at (x, y)."""
-    width = FONT.render(label, True, (0, 0, 0)).get_width() + 2 * padding
+    import pygame
+    width = _ui["FONT"].render(label, True, (0, 0, 0)).get_width() + 2 * padding
     rect = pygame.Rect(x, y, width, height)
     return rect, x + width + 10  # Return new rect and next x-position
 
-x = 10
-y = 10
-
-SAVE_BUTTON_RECT, x = next_button("Save", x, y)
-LOAD_BUTTON_RECT, x = next_button("Load", x, y)
-K_INPUT_BOX_RECT, x = next_button("k=3", x, y)
-SELECT_ST_BUTTON_RECT, x = next_button("Select S/T", x, y)
-TOGGLE_DIRECTED_RECT, x = next_button("Directed: OFF", x, y)
-CLEAR_BUTTON_RECT, x = next_button("Clear", x, y)
-COMPLEMENT_BUTTON_RECT, x = next_button("Complement", x, y)
-DUPLICATE_BUTTON_RECT, x = next_button("Duplicate", x, y)
-RANDOM_BUTTON_RECT, x = next_button("Random", x, y)
-INCLUDE_ALGO_BUTTON_RECT, x = next_button("Algorithms: ON", x, y)
-
-# Optional: Slider below Duplicate
-DUPLICATE_SLIDER_RECT = pygame.Rect(
-    DUPLICATE_BUTTON_RECT.x,
-    DUPLICATE_BUTTON_RECT.bottom + 4,
-    DUPLICATE_BUTTON_RECT.width,
-    12
-)
-
-
-VERTEX_LIMIT = 75
-EDGE_LIMIT = 150
+
+def _build_ui():
+    import pygame
+    pygame.font.init()
+
+    # Fonts
+    _ui["FONT"] = pygame.font.SysFont("Segoe UI", 13, bold=True)
+    _ui["INPUT_FONT"] = pygame.font.SysFont("consolas", 16, bold=True)
+    _ui["DEBUG_FONT"] = pygame.font.SysFont("consolas", 16)
+
+    x = 10
+    y = 10
+    for name, label in [("SAVE_BUTTON_RECT", "Save"), ("LOAD_BUTTON_RECT", "Load"),
+                        ("K_INPUT_BOX_RECT", "k=3"), ("SELECT_ST_BUTTON_RECT", "Select S/T"),
+                        ("TOGGLE_DIRECTED_RECT", "Directed: OFF"), ("CLEAR_BUTTON_RECT", "Clear"),
+                        ("COMPLEMENT_BUTTON_RECT", "Complement"), ("DUPLICATE_BUTTON_RECT", "Duplicate"),
+                        ("RANDOM_BUTTON_RECT", "Random"), ("LAYOUT_BUTTON_RECT", "Layout: OFF"),
+                        ("INCLUDE_ALGO_BUTTON_RECT", "Algorithms: ON")]:
+        _ui[name], x = next_button(label, x, y)
+
+    # Optional: Slider below Duplicate
+    duplicate = _ui["DUPLICATE_BUTTON_RECT"]
+    _ui["DUPLICATE_SLIDER_RECT"] = pygame.Rect(duplicate.x, duplicate.bottom + 4, duplicate.width, 12)
+
+
+UI_NAMES = ("FONT", "INPUT_FONT", "DEBUG_FONT", "SAVE_BUTTON_RECT", "LOAD_BUTTON_RECT", "K_INPUT_BOX_RECT",
+            "SELECT_ST_BUTTON_RECT", "TOGGLE_DIRECTED_RECT", "CLEAR_BUTTON_RECT", "COMPLEMENT_BUTTON_RECT",
+            "DUPLICATE_BUTTON_RECT", "RANDOM_BUTTON_RECT", "LAYOUT_BUTTON_RECT", "INCLUDE_ALGO_BUTTON_RECT",
+            "DUPLICATE_SLIDER_RECT")
+
+
+def __getattr__(name):
+    if name not in UI_NAMES:
+        raise AttributeError(f"module 'config' has no attribute {name!r}")
+    if not _ui:
+        _build_ui()
+    return _ui[name]
+
+
+# File used by the Save/Load buttons: ".json" is the interchange format,
+# ".gtvg" the compact binary one for large graphs
+GRAPH_FILE = "graph.json"
+
+VERTEX_LIMIT = 2000
+EDGE_LIMIT = 5000
+
+# Level of detail: the graph is drawn as points below LOD_POINT_SPACING pixels of
+# screen area per visible vertex (square root), without labels below
+# LOD_LABEL_SPACING or when zoomed out past LOD_LABEL_MIN_SCALE.
+LOD_POINT_SPACING = VERTEX_RADIUS
+LOD_LABEL_SPACING = 2 * VERTEX_RADIUS
+LOD_LABEL_MIN_SCALE = 0.6
+LOD_POINT_RADIUS = 2
+
+# Where NP solvers and graph algorithms run: "process" uses a worker pool so
+# their CPU work never competes with the frame loop, "thread" keeps them in
+# background threads of the UI process.
+SOLVER_BACKEND = "process"
+SOLVER_PROCESSES = None  # None = one worker per CPU core
+
+# Search nodes the dominating-set branch and bound may visit (a few seconds of
+# work) before the row reports the instance as too large
+SEARCH_NODE_LIMIT = 10000
+
+# Auto-layout: milliseconds of force computation per frame, and the Barnes–Hut
+# opening angle (larger = coarser but faster repulsion)
+LAYOUT_FRAME_BUDGET_MS = 6
+LAYOUT_THETA = 0.9
+
+# Memory budget of the rendered math label cache, in bytes of surface pixels
+MATH_SURFACE_CACHE_BYTES = 32 * 1024 * 1024
+
 # Colors to avoid (RGB)
 AVOID_COLORS = [
     (100, 149, 237),  # VERTEX_COLOR
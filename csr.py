@@ -0,0 +1,167 @@
+from array import array
+
+
+def edge_weight(edge):
+    """Numeric weight of an edge; unlabeled or non-numeric edges weigh 1."""
+    if edge.value is None:
+        return 1.0
+    try:
+        return float(edge.value)
+    except ValueError:
+        return 1.0
+
+
+class CSRGraph:
+    """
+    Compressed-sparse-row adjacency for one version of the graph.
+
+    Vertex ids are positions in the vertex list the graph was built from;
+    `names[i]` and `index[name]` convert between ids and vertex names.
+    The outgoing arcs of vertex `i` are `targets[offsets[i]:offsets[i + 1]]`
+    with matching `weights`. Undirected graphs store every edge in both
+    directions and share the forward arrays as the reverse ones; directed
+    graphs get a separate reverse CSR of incoming arcs.
+
+    The original edge list is kept as `edge_src`, `edge_dst` and `edge_w`.
+    """
+
+    def __init__(self, names, edge_src, edge_dst, edge_w, directed):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.n = len(names)
+        self.directed = directed
+        self.edge_src = edge_src
+        self.edge_dst = edge_dst
+        self.edge_w = edge_w
+
+        if directed:
+            self.offsets, self.targets, self.weights = self._pack(edge_src, edge_dst, edge_w, both=False)
+            self.rev_offsets, self.rev_targets, self.rev_weights = self._pack(edge_dst, edge_src, edge_w, both=False)
+        else:
+            self.offsets, self.targets, self.weights = self._pack(edge_src, edge_dst, edge_w, both=True)
+            self.rev_offsets, self.rev_targets, self.rev_weights = self.offsets, self.targets, self.weights
+
+    def _pack(self, src, dst, w, both):
+        """Counting sort of arcs by source; keeps the original edge order per vertex."""
+        n = self.n
+        counts = array("l", [0]) * (n + 1)
+        for i in src:
+            counts[i + 1] += 1
+        if both:
+            for j in dst:
+                counts[j + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+
+        offsets = array("l", counts)
+        cursor = array("l", counts)
+        size = counts[n]
+        targets = array("l", [0]) * size
+        weights = array("d", [0.0]) * size
+        for i, j, wt in zip(src, dst, w):
+            p = cursor[i]
+            targets[p] = j
+            weights[p] = wt
+            cursor[i] = p + 1
+            if both:
+                p = cursor[j]
+                targets[p] = i
+                weights[p] = wt
+                cursor[j] = p + 1
+        return offsets, targets, weights
+
+    @property
+    def edge_count(self):
+        return len(self.edge_src)
+
+    def degree(self, i):
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def neighbors(self, i):
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def in_neighbors(self, i):
+        return self.rev_targets[self.rev_offsets[i]:self.rev_offsets[i + 1]]
+
+    def arcs(self, i):
+        """(neighbor, weight) pairs of the outgoing arcs of `i`."""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return zip(self.targets[start:end], self.weights[start:end])
+
+    def neighbor_sets(self):
+        """Per-vertex sets of neighbor ids; computed once per CSR."""
+        sets = getattr(self, "_neighbor_sets", None)
+        if sets is None:
+            sets = [set(self.neighbors(i)) for i in range(self.n)]
+            self._neighbor_sets = sets
+        return sets
+
+    def neighbor_masks(self):
+        """Per-vertex neighbor bitmasks (bit j set when j is adjacent, self-loops dropped);
+        computed once per CSR. Build the CSR undirected for symmetric masks."""
+        masks = getattr(self, "_neighbor_masks", None)
+        if masks is None:
+            masks = []
+            for i in range(self.n):
+                m = 0
+                for j in self.neighbors(i):
+                    m |= 1 << j
+                masks.append(m & ~(1 << i))
+            self._neighbor_masks = masks
+        return masks
+
+
+class GraphSnapshot:
+    """
+    Immutable, picklable copy of one graph version: vertex names and
+    positions plus the edge list as flat arrays. Solvers read the graph
+    through `csr(directed)`, so they never touch the live lists and the
+    snapshot can be shipped to worker processes as is.
+    """
+
+    def __init__(self, names, xs, ys, edge_src, edge_dst, edge_w):
+        self.names = names
+        self.xs = xs
+        self.ys = ys
+        self.edge_src = edge_src
+        self.edge_dst = edge_dst
+        self.edge_w = edge_w
+        self._csr = {}
+
+    @classmethod
+    def from_graph(cls, vertices, edges):
+        names = [v.name for v in vertices]
+        index = {name: i for i, name in enumerate(names)}
+        xs = array("d", (v.pos[0] for v in vertices))
+        ys = array("d", (v.pos[1] for v in vertices))
+        edge_src, edge_dst, edge_w = array("l"), array("l"), array("d")
+        for e in edges:
+            i = index.get(e.start.name)
+            j = index.get(e.end.name)
+            if i is None or j is None:
+                continue  # edge of a vertex that is being deleted
+            edge_src.append(i)
+            edge_dst.append(j)
+            edge_w.append(edge_weight(e))
+        return cls(names, xs, ys, edge_src, edge_dst, edge_w)
+
+    def with_positions(self, vertices):
+        """Copy sharing the edge arrays (and built CSRs) but with the current
+        positions of `vertices`, which must be the list this snapshot was built from."""
+        snapshot = GraphSnapshot(self.names, array("d", (v.pos[0] for v in vertices)),
+                                 array("d", (v.pos[1] for v in vertices)),
+                                 self.edge_src, self.edge_dst, self.edge_w)
+        snapshot._csr = self._csr
+        return snapshot
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_csr"] = {}  # rebuilt on demand; cheaper than pickling it
+        return state
+
+    def csr(self, directed=False):
+        csr = self._csr.get(directed)
+        if csr is None:
+            csr = CSRGraph(self.names, self.edge_src, self.edge_dst, self.edge_w, directed)
+            self._csr[directed] = csr
+        return csr
@@ -1,11 +1,22 @@
-import pygame
-
 from config import DEBUG_HOVER_COLOR
-from math_text import get_math_surface
-from utils import generic_dfs, dfs_stack, GraphState
+from utils import lowlink_dfs, GraphState
 
 
 class GraphDiagnostics:
+    """
+    Structural metrics of the graph shown in the bottom panel.
+
+    A full pass computes everything from the CSR; cyclicity, SCCs, bridges
+    and cut vertices come from the iterative low-link DFS in `lowlink_dfs`.
+    Bridges and cut vertices are those of the underlying undirected graph.
+    After that, edits that only append vertices or edges are applied
+    incrementally: components and bipartite parity live in a union-find with
+    parity bits, degrees in a table, and an edge between two components is a
+    new bridge. The low-link metrics are recomputed only when an appended
+    edge can change them. Any other edit (removal, rename, reordering,
+    directed toggle) falls back to a full pass.
+    """
+
     def __init__(self, vertices, edges):
         self.hovered_diagnostic = None
         self.needs_update = True
@@ -13,13 +24,19 @@ class GraphDiagnostics:
         self.edges = edges
         self.info = {}
         self.bridges = []
+        self.cut_vertices = []
+        self._last_state_key = None
+        self._seen = None  # (vertex rewrites, edge rewrites, vertex count, edge count) already applied
         self.graph_state = GraphState(lambda: self.vertices, lambda: self.edges)
 
     def reset(self):
         self.hovered_diagnostic = None
         self.needs_update = True
+        self._last_state_key = None
+        self._seen = None
         self.info.clear()
         self.bridges.clear()
+        self.cut_vertices.clear()
 
     def mark_dirty(self):
         self.needs_update = True
@@ -27,121 +44,166 @@ class GraphDiagnostics:
 
     def update(self, directed=False, compute_enabled=True):
         if compute_enabled:
-            if not self.needs_update:
+            state_key = (self.graph_state.version(), directed)
+            if not self.needs_update and state_key == self._last_state_key:
                 return
             self.needs_update = False
+            self._last_state_key = state_key
+
+            if not self._apply_appends(directed):
+                self._full_pass(directed)
+            self._refresh_stale()
+            self._publish()
+            self._seen = (self.vertices.rewrites, self.edges.rewrites, len(self.vertices), len(self.edges))
+
+    def _full_pass(self, directed):
+        self.csr = self.graph_state.get_csr(directed)
+        n = self.csr.n
+        self._directed = directed
+        self._names = list(self.csr.names)
+        self._ids = {v: i for i, v in enumerate(self.vertices)}
+        self._parent = list(range(n))
+        self._parity = [0] * n
+        self._size = [1] * n
+        self._degrees = [self.csr.degree(i) for i in range(n)]
+        self._components = n
+        for e in self.edges:
+            if self._union(self._ids[e.start], self._ids[e.end]):
+                self._components -= 1
+
+        self._bipartite = self._is_bipartite() if not directed else "N/A"
+        self._stale = {"cyclic", "sccs", "cuts"} if directed else {"cuts"}
+
+    def _apply_appends(self, directed):
+        """Apply vertices and edges appended since the last update; False if a full pass is needed."""
+        if self._seen is None or directed != self._directed:
+            return False
+        vertex_rewrites, edge_rewrites, vertex_count, edge_count = self._seen
+        if (self.vertices.rewrites != vertex_rewrites or self.edges.rewrites != edge_rewrites
+                or len(self.vertices) < vertex_count or len(self.edges) < edge_count):
+            return False
 
-            self.adj = self.graph_state.get_adj(directed)
-            self.rev_adj = self.graph_state.get_rev_adj() if directed else None
-
-            # Core structure
-            self.info.clear()
-            visited = set()
-            self.info["Cyclic"] = self._has_cycle(directed, visited.copy())
-            self.info["Components"] = self._component_count(visited.copy())
-
-            self.info["SCCs"] = (
-                self._strongly_connected_components() if directed else self.info["Components"]
-            )
-
-            self.info["Tree"] = not directed and not self.info["Cyclic"] and self.info["Components"] == 1
-            self.info["Forest"] = not directed and not self.info["Cyclic"]
-            self.info["Bipartite"] = self._is_bipartite() if not directed else "N/A"
-
-            # Bridges
-            self.bridges = self._find_bridges()
-            self.info["Bridges"] = (len(self.bridges), self.bridges)
-
-            # Degree stats
-            degrees = [(v.name, len(self.adj[v.name])) for v in self.vertices]
-            if degrees:
-                max_val = max(degrees, key=lambda x: x[1])[1]
-                min_val = min(degrees, key=lambda x: x[1])[1]
-                max_nodes = [name for name, deg in degrees if deg == max_val]
-                min_nodes = [name for name, deg in degrees if deg == min_val]
-            else:
-                max_val, min_val, max_nodes, min_nodes = 0, 0, [], []
-
-            self.info["Max Degree"] = (max_val, max_nodes)
-            self.info["Min Degree"] = (min_val, min_nodes)
-
-    def _find_bridges(self):
-        time = [0]
-        visited = set()
-        tin = {}
-        low = {}
-        bridges = []
-
-        for v in self.adj:
-            if v not in visited:
-                generic_dfs(self.adj, v, visited, tin=tin, low=low, time=time, bridges=bridges)
-
-        return bridges
-
-    def _has_cycle(self, directed, visited):
-        if directed:
-            rec_stack = set()
-            try:
-                for v in self.adj:
-                    if v not in visited:
-                        generic_dfs(self.adj, v, visited, rec_stack=rec_stack)
+        for v in self.vertices[vertex_count:]:
+            self._ids[v] = len(self._names)
+            self._names.append(v.name)
+            self._parent.append(len(self._parent))
+            self._parity.append(0)
+            self._size.append(1)
+            self._degrees.append(0)
+            self._components += 1
+            if directed:
+                self._sccs += 1
+        for e in self.edges[edge_count:]:
+            u, v = self._ids.get(e.start), self._ids.get(e.end)
+            if u is None or v is None or not self._add_edge(u, v):
                 return False
-            except Exception as e:
-                if str(e) == "CycleDetected":
-                    return True
-                return None
+        return True
+
+    def _add_edge(self, u, v):
+        self._degrees[u] += 1
+        if not self._directed:
+            self._degrees[v] += 1
+
+        (root_u, parity_u), (root_v, parity_v) = self._find(u), self._find(v)
+        if root_u != root_v:
+            # A new bridge, which cannot close a cycle or merge SCCs. An endpoint
+            # with other vertices in its old component now separates them from the far side.
+            for w, root in ((u, root_u), (v, root_v)):
+                if self._size[root] > 1:
+                    self._cuts.add(w)
+            self._union(u, v)
+            self._components -= 1
+            self.bridges.append((min(self._names[u], self._names[v]), max(self._names[u], self._names[v])))
+            return True
+
+        if self._directed:
+            if self._cyclic is False:
+                self._stale.add("cyclic")
+            self._stale.add("sccs")
         else:
-            def dfs(u, parent):
-                visited.add(u)
-                for v, _ in self.adj[u]:
-                    if v not in visited:
-                        if dfs(v, u):
-                            return True
-                    elif v != parent:
-                        return True
-                return False
+            self._cyclic = True
+            if parity_u == parity_v:
+                self._bipartite = False
+        if u != v:
+            self._stale.add("cuts")  # the new cycle may absorb existing bridges and cut vertices
+        return True
 
-            for v in self.adj:
-                if v not in visited:
-                    if dfs(v, None):
-                        return True
+    def _refresh_stale(self):
+        """Recompute only the metrics invalidated by the appended edges."""
+        stale = self._stale
+        if self._directed and ("cyclic" in stale or "sccs" in stale):
+            result = lowlink_dfs(self.graph_state.get_csr(directed=True))
+            self._cyclic = result.cyclic
+            self._sccs = result.count
+        if "cuts" in stale:
+            result = lowlink_dfs(self.graph_state.get_csr(directed=False))
+            if not self._directed:
+                self._cyclic = result.cyclic
+            names = self._names
+            self.bridges = [(min(names[u], names[v]), max(names[u], names[v])) for u, v in result.bridges]
+            self._cuts = set(result.cut_vertices)
+        stale.clear()
+
+    def _publish(self):
+        directed = self._directed
+        self.info.clear()
+        self.info["Cyclic"] = self._cyclic
+        self.info["Components"] = self._components
+        self.info["SCCs"] = self._sccs if directed else self._components
+        self.info["Tree"] = not directed and not self._cyclic and self._components == 1
+        self.info["Forest"] = not directed and not self._cyclic
+        self.info["Bipartite"] = self._bipartite
+        self.info["Bridges"] = (len(self.bridges), self.bridges)
+        self.cut_vertices = [self._names[i] for i in sorted(self._cuts)]
+        self.info["Cut Vertices"] = (len(self.cut_vertices), self.cut_vertices)
+
+        # Degree stats
+        names, degrees = self._names, self._degrees
+        if degrees:
+            max_val = max(degrees)
+            min_val = min(degrees)
+            max_nodes = [names[i] for i, deg in enumerate(degrees) if deg == max_val]
+            min_nodes = [names[i] for i, deg in enumerate(degrees) if deg == min_val]
+        else:
+            max_val, min_val, max_nodes, min_nodes = 0, 0, [], []
+
+        self.info["Max Degree"] = (max_val, max_nodes)
+        self.info["Min Degree"] = (min_val, min_nodes)
+
+    def _find(self, x):
+        """Root of `x` and the parity of its path to the root, with path compression."""
+        parent, parity = self._parent, self._parity
+        path = []
+        while parent[x] != x:
+            path.append(x)
+            x = parent[x]
+        root, total = x, 0
+        for node in reversed(path):
+            total ^= parity[node]
+            parity[node] = total
+            parent[node] = root
+        return root, (parity[path[0]] if path else 0)
+
+    def _union(self, u, v):
+        """Join the sets of u and v so that u and v get opposite parity; False if already joined."""
+        (root_u, parity_u), (root_v, parity_v) = self._find(u), self._find(v)
+        if root_u == root_v:
             return False
-
-    def _component_count(self, visited):
-        count = 0
-        for v in self.adj:
-            if v not in visited:
-                dfs_stack(self.adj, v, visited)
-                count += 1
-        return count
-
-    def _strongly_connected_components(self):
-        visited = set()
-        order = []
-
-        for v in self.adj:
-            if v not in visited:
-                generic_dfs(self.adj, v, visited, on_exit=order.append)
-
-        visited.clear()
-        count = 0
-        for v in reversed(order):
-            if v not in visited:
-                dfs_stack(self.rev_adj, v, visited)
-                count += 1
-
-        return count
+        self._parent[root_v] = root_u
+        self._size[root_u] += self._size[root_v]
+        self._parity[root_v] = parity_u ^ parity_v ^ 1
+        return True
 
     def _is_bipartite(self):
-        color = {}
-        for v in self.adj:
-            if v not in color:
+        color = [-1] * self.csr.n
+        for v in range(self.csr.n):
+            if color[v] < 0:
                 queue = [v]
                 color[v] = 0
                 while queue:
                     u = queue.pop()
-                    for n, _ in self.adj[u]:
-                        if n not in color:
+                    for n in self.csr.neighbors(u):
+                        if color[n] < 0:
                             color[n] = 1 - color[u]
                             queue.append(n)
                         elif color[n] == color[u]:
@@ -149,6 +211,8 @@ class GraphDiagnostics:
         return True
 
     def render(self, screen, font, mouse_pos=None):
+        import pygame
+        from math_text import get_math_surface
         y_start = screen.get_height() - len(self.info) * 15 - 115
         self.hovered_diagnostic = None
 
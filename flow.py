@@ -0,0 +1,247 @@
+"""
+Max-flow and minimum-cut engines over CSR vertex ids.
+
+Like the bitset engines, every function accepts an optional threading.Event;
+once it is set the search raises SolverCancelled.
+"""
+import heapq
+from array import array
+
+from bitset_engines import check_cancelled
+from utils import lowlink_dfs
+
+
+class FlowNetwork:
+    """
+    Residual network in flat arrays. Arc `a` runs to `to[a]` with capacity
+    `capacity[a]`; arcs are added in pairs, so `a ^ 1` is the reverse of `a`.
+    The arcs out of node u are chained from `first[u]` through `next_arc`.
+    `max_flow` works on a fresh copy of the capacities, so one network can
+    be solved for many source/sink pairs.
+    """
+
+    def __init__(self, node_count):
+        self.node_count = node_count
+        self.first = array("l", [-1]) * node_count
+        self.next_arc = array("l")
+        self.to = array("l")
+        self.capacity = array("l")
+        self.residual = None
+
+    def add_arc(self, u, v, capacity):
+        for a, b, c in ((u, v, capacity), (v, u, 0)):
+            self.next_arc.append(self.first[a])
+            self.first[a] = len(self.to)
+            self.to.append(b)
+            self.capacity.append(c)
+
+    def _levels(self, s, t):
+        """BFS distances from `s` in the residual network, up to the distance of `t`."""
+        level = array("l", [-1]) * self.node_count
+        level[s] = 0
+        queue = [s]
+        first, next_arc, to, residual = self.first, self.next_arc, self.to, self.residual
+        for u in queue:
+            if 0 <= level[t] <= level[u]:
+                break
+            a = first[u]
+            while a >= 0:
+                v = to[a]
+                if residual[a] > 0 and level[v] < 0:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+                a = next_arc[a]
+        return level
+
+    def _augment(self, s, t, level, current):
+        """Push flow along one s-t path of the level graph; returns the amount (0 when blocked)."""
+        next_arc, to, residual = self.next_arc, self.to, self.residual
+        path = []  # arcs from s to u
+        u = s
+        while u != t:
+            a = current[u]
+            while a >= 0 and not (residual[a] > 0 and level[to[a]] == level[u] + 1):
+                a = next_arc[a]
+            current[u] = a
+            if a >= 0:
+                path.append(a)
+                u = to[a]
+                continue
+            # Dead end: retreat and skip the arc that led here
+            level[u] = -1
+            if not path:
+                return 0
+            a = path.pop()
+            u = to[a ^ 1]
+            current[u] = next_arc[a]
+        pushed = min(residual[a] for a in path)
+        for a in path:
+            residual[a] -= pushed
+            residual[a ^ 1] += pushed
+        return pushed
+
+    def max_flow(self, s, t, limit=None, cancel_event=None):
+        """
+        Dinic's algorithm: augment along shortest paths, one BFS level
+        graph per phase. Stops early once the flow reaches `limit`, in which
+        case the flow is only known to be at least `limit`.
+        """
+        self.residual = array("l", self.capacity)
+        flow = 0
+        while limit is None or flow < limit:
+            check_cancelled(cancel_event)
+            level = self._levels(s, t)
+            if level[t] < 0:
+                break
+            current = array("l", self.first)
+            while limit is None or flow < limit:
+                pushed = self._augment(s, t, level, current)
+                if not pushed:
+                    break
+                flow += pushed
+        return flow
+
+    def source_side(self, s):
+        """Nodes reachable from `s` in the residual network of the last max_flow."""
+        seen = bytearray(self.node_count)
+        seen[s] = 1
+        stack = [s]
+        first, next_arc, to, residual = self.first, self.next_arc, self.to, self.residual
+        while stack:
+            a = first[stack.pop()]
+            while a >= 0:
+                v = to[a]
+                if residual[a] > 0 and not seen[v]:
+                    seen[v] = 1
+                    stack.append(v)
+                a = next_arc[a]
+        return seen
+
+
+def vertex_connectivity(csr, cancel_event=None):
+    """
+    Vertex connectivity κ by Menger's theorem and Even's algorithm. Vertex
+    v becomes the nodes 2v → 2v + 1 joined by a unit arc, so a minimum
+    s-t vertex separator is a minimum cut of the split network, and each
+    flow stops once it reaches the best separator so far. Disconnected
+    graphs and cut vertices are found by `lowlink_dfs` first.
+
+    Directed graphs ask for strong connectivity: Even's algorithm tries both
+    directions between each of the first κ + 1 vertices and every other
+    vertex, since a minimum separator misses one of them. Undirected graphs
+    use the Esfahanian–Hakimi refinement: flows from one minimum-degree
+    vertex v to every other vertex, then between every two neighbors of v.
+
+    Returns (κ, separator ids), or (n - 1, None) when no vertex set
+    disconnects the graph (complete graphs and graphs with under two vertices).
+    """
+    n, directed = csr.n, csr.directed
+    out_sets = csr.neighbor_sets()
+    in_sets = [set(csr.in_neighbors(i)) for i in range(n)] if directed else out_sets
+
+    # Cutting the neighbors of a vertex isolates it: κ is at most the minimum degree
+    best, separator = max(n - 1, 0), None
+    for v in range(n):
+        for nbrs in (out_sets[v], in_sets[v]):
+            nbrs = nbrs - {v}
+            if len(nbrs) < best:
+                best, separator = len(nbrs), sorted(nbrs)
+    if best == 0:
+        return best, separator
+
+    # Connectivity 0 and (undirected) cut vertices come from one low-link pass
+    lowlink = lowlink_dfs(csr)
+    if lowlink.count > 1:
+        return 0, []
+    if best == 1:
+        return best, separator
+    if lowlink.cut_vertices:
+        return 1, lowlink.cut_vertices[:1]
+
+    network = FlowNetwork(2 * n)
+    for v in range(n):
+        network.add_arc(2 * v, 2 * v + 1, 1)
+        for u in out_sets[v]:
+            if u != v:
+                network.add_arc(2 * v + 1, 2 * u, n)
+
+    def separate(s, t):
+        nonlocal best, separator
+        if t in out_sets[s]:
+            return
+        if network.max_flow(2 * s + 1, 2 * t, best, cancel_event) < best:
+            reached = network.source_side(2 * s + 1)
+            separator = [v for v in range(n) if reached[2 * v] and not reached[2 * v + 1]]
+            best = len(separator)
+
+    if directed:
+        s = 0
+        while s <= best and s < n:
+            for t in range(n):
+                if t != s:
+                    separate(s, t)
+                    separate(t, s)
+            s += 1
+        return best, separator
+
+    # Undirected graphs: a minimum separator either misses a minimum-degree
+    # vertex v, or contains it and splits two of its neighbors
+    v = min(range(n), key=lambda u: len(out_sets[u]))
+    for t in range(n):
+        if t != v:
+            separate(v, t)
+    nbrs = sorted(out_sets[v] - {v})
+    for i, x in enumerate(nbrs):
+        for y in nbrs[i + 1:]:
+            separate(x, y)
+    return best, separator
+
+
+def stoer_wagner(n, edge_src, edge_dst, edge_w, cancel_event=None):
+    """
+    Global minimum edge cut of a weighted undirected graph by Stoer–Wagner.
+    Each phase grows a maximum-adjacency order with a lazy heap; the last
+    vertex added is cut off by the phase's cut, and the last two vertices
+    are then merged. Weights must be non-negative. Returns (cut weight, ids
+    on one side); a graph with under two vertices has no cut and returns (0, []).
+    """
+    adj = [{} for _ in range(n)]
+    for u, v, w in zip(edge_src, edge_dst, edge_w):
+        if u != v:
+            adj[u][v] = adj[u].get(v, 0.0) + w
+            adj[v][u] = adj[v].get(u, 0.0) + w
+    members = [[v] for v in range(n)]
+    active = set(range(n))
+    best, side = float("inf"), []
+
+    while len(active) > 1:
+        check_cancelled(cancel_event)
+        key = dict.fromkeys(active, 0.0)
+        heap = [(0.0, v) for v in active]
+        added = set()
+        prev = last = None
+        phase_cut = 0.0
+        while heap:
+            neg, v = heapq.heappop(heap)
+            if v in added or -neg != key[v]:
+                continue
+            added.add(v)
+            prev, last, phase_cut = last, v, key[v]
+            for u, w in adj[v].items():
+                if u not in added:
+                    key[u] += w
+                    heapq.heappush(heap, (-key[u], u))
+        if phase_cut < best:
+            best, side = phase_cut, list(members[last])
+
+        # Merge the last vertex into the one added before it
+        members[prev].extend(members[last])
+        for u, w in adj[last].items():
+            del adj[u][last]
+            if u != prev:
+                adj[prev][u] = adj[prev].get(u, 0.0) + w
+                adj[u][prev] = adj[u].get(prev, 0.0) + w
+        adj[last] = {}
+        active.discard(last)
+
+    return (best, sorted(side)) if n > 1 else (0, [])
@@ -1,7 +1,6 @@
-from math_text import get_math_surface
 import math
 from config import *
-from utils import get_base_and_index, is_within_screen_margin, is_clear_position
+from utils import get_base_and_index, is_within_bounds, is_clear_position
 
 
 class Vertex:
@@ -11,33 +10,40 @@ class Vertex:
         self.highlight = False
         self.custom_color = custom_color
 
-    def draw(self, screen, selected=False, hovered=False, st_highlight=False, live_name=None):
+    def fill_color(self, selected=False, hovered=False):
         if self.custom_color:
-            color = self.custom_color
-        else:
-            if self.custom_color:
-                color = self.custom_color
-            elif selected:
-                color = SELECTED_COLOR
-            elif self.highlight:
-                color = HIGHLIGHT_COLOR
-            elif hovered:
-                color = VERTEX_HOVER_COLOR
-            else:
-                color = VERTEX_COLOR
+            return self.custom_color
+        elif selected:
+            return SELECTED_COLOR
+        elif self.highlight:
+            return HIGHLIGHT_COLOR
+        elif hovered:
+            return VERTEX_HOVER_COLOR
+        return VERTEX_COLOR
+
+    def draw(self, screen, selected=False, hovered=False, st_highlight=False, live_name=None, label=True,
+             camera=None):
+        import pygame
+        from math_text import get_math_surface
+        color = self.fill_color(selected, hovered)
+        center = camera.to_screen(self.pos) if camera else self.pos
 
         outline_color = ST_OUTLINE_COLOR if st_highlight else VERTEX_OUTLINE_COLOR
-        pygame.draw.circle(screen, outline_color, self.pos, VERTEX_RADIUS + 2)
-        pygame.draw.circle(screen, color, self.pos, VERTEX_RADIUS)
+        pygame.draw.circle(screen, outline_color, center, VERTEX_RADIUS + 2)
+        pygame.draw.circle(screen, color, center, VERTEX_RADIUS)
+        if not label:
+            return
         label_text = live_name if live_name is not None else self.name
         label_color = DEBUG_HOVER_COLOR if live_name is not None else (255, 255, 255)
         label = get_math_surface(label_text, color=label_color)
-        screen.blit(label, label.get_rect(center=self.pos))
-        screen.blit(label, label.get_rect(center=self.pos))
-
-    def is_clicked(self, pos):
-        dx = self.pos[0] - pos[0]
-        dy = self.pos[1] - pos[1]
+        screen.blit(label, label.get_rect(center=center))
+        screen.blit(label, label.get_rect(center=center))
+
+    def is_clicked(self, pos, camera=None):
+        """Whether the screen point `pos` is inside the circle drawn through `camera`."""
+        x, y = camera.to_screen(self.pos) if camera else self.pos
+        dx = x - pos[0]
+        dy = y - pos[1]
         return dx * dx + dy * dy <= VERTEX_RADIUS ** 2
 
 
@@ -49,10 +55,12 @@ class Edge:
         self.value = value
         self.highlight = False
 
-    def draw(self, screen, directed=False, offset_angle=0, show_weight=False, live_value=None):
+    def draw(self, screen, directed=False, offset_angle=0, show_weight=False, live_value=None, camera=None):
+        import pygame
+        from math_text import get_math_surface
         color = EDGE_HOVER_COLOR if self.highlight else EDGE_COLOR
-        x1, y1 = self.start.pos
-        x2, y2 = self.end.pos
+        x1, y1 = camera.to_screen(self.start.pos) if camera else self.start.pos
+        x2, y2 = camera.to_screen(self.end.pos) if camera else self.end.pos
 
         # Optional offset for opposite direction arrow
         dx, dy = x2 - x1, y2 - y1
@@ -94,6 +102,7 @@ class Edge:
 
     @staticmethod
     def _draw_arrowhead(screen, x1, y1, x2, y2, color):
+        import pygame
         angle = math.atan2(y2 - y1, x2 - x1)
         offset = VERTEX_RADIUS + 4  # Pull arrow back from center
         tip_x = x2 - offset * math.cos(angle)
@@ -106,9 +115,9 @@ class Edge:
                  tip_y - length * math.sin(angle + math.pi / 6))
         pygame.draw.polygon(screen, color, [(tip_x, tip_y), left, right])
 
-    def is_clicked(self, pos):
-        x1, y1 = self.start.pos
-        x2, y2 = self.end.pos
+    def is_clicked(self, pos, camera=None):
+        x1, y1 = camera.to_screen(self.start.pos) if camera else self.start.pos
+        x2, y2 = camera.to_screen(self.end.pos) if camera else self.end.pos
         px, py = pos
         dx, dy = x2 - x1, y2 - y1
         if dx == dy == 0:
@@ -120,24 +129,54 @@ class Edge:
         dist_sq = (closest[0] - px) ** 2 + (closest[1] - py) ** 2
         return dist_sq <= EDGE_CLICK_RADIUS ** 2
 
-def get_vertex_at_pos(vertices, pos):
-    return next((v for v in vertices if v.is_clicked(pos)), None)
+def draw_graph_points(screen, vertices, edges, selected=None, hovered=None, source=None, target=None, camera=None):
+    """
+    Lowest level of detail: one-pixel edges and small squares for vertices,
+    without outlines, labels or arrowheads. Colors follow Vertex/Edge.draw.
+    """
+    import pygame
+    scale, ox, oy = camera.key if camera else (1.0, 0.0, 0.0)
+    screen_pos = {v: (v.pos[0] * scale + ox, v.pos[1] * scale + oy) for v in vertices}
+    line = pygame.draw.line
+    for e in edges:
+        if e.highlight:
+            line(screen, EDGE_HOVER_COLOR, screen_pos[e.start], screen_pos[e.end], 2)
+        else:
+            line(screen, EDGE_COLOR, screen_pos[e.start], screen_pos[e.end], 1)
+
+    fill = screen.fill
+    r = LOD_POINT_RADIUS
+    side = 2 * r + 1
+    for v, (x, y) in screen_pos.items():
+        if v is source or v is target:
+            color = ST_OUTLINE_COLOR
+        else:
+            color = v.fill_color(v is selected, v is hovered)
+        fill(color, (int(x) - r, int(y) - r, side, side))
+
+
+def get_vertex_at_pos(vertices, pos, camera=None):
+    return next((v for v in vertices if v.is_clicked(pos, camera)), None)
 
 # def get_edges_at_pos_original(edges, pos):
 #     return [e for e in edges if e.is_clicked(pos)]
 
-def get_edge_at_pos(edges, pos):
+def get_edge_at_pos(edges, pos, edge_index=None, camera=None):
+    """Closest edge to the screen point `pos` among `edges` as drawn through `camera`;
+    `edge_index` is the graph's EdgeList (defaults to `edges` itself) and answers
+    the opposite-edge question."""
+    edge_index = edges if edge_index is None else edge_index
     closest_edge = None
     closest_dist_sq = float('inf')
 
     for e in edges:
         # Determine if this edge has an opposite
-        is_opposite = any(e2.start == e.end and e2.end == e.start for e2 in edges if e2 != e)
+        is_opposite = edge_index.has_opposite(e)
         offset_angle = math.pi / 18 if is_opposite else 0
 
         # Compute offset positions to match how it's drawn
-        x1, y1 = e.start.pos
-        x2, y2 = e.end.pos
+        x1, y1 = camera.to_screen(e.start.pos) if camera else e.start.pos
+        x2, y2 = camera.to_screen(e.end.pos) if camera else e.end.pos
         dx, dy = x2 - x1, y2 - y1
         angle = math.atan2(dy, dx)
 
@@ -176,13 +215,12 @@ def rebuild_edge_lookup(edges):
     return set((min(e.start.name, e.end.name), max(e.start.name, e.end.name)) for e in edges)
 
 
-def duplicate_graph(og_vertices, og_edges, spacing=(70, 70), times=1):
+def duplicate_graph(og_vertices, og_edges, bounds, spacing=(70, 70), times=1):
     """
     Duplicates the original graph `times` times in a grid layout,
-    avoiding overlap and off-screen placement.
+    avoiding overlap and placement outside the world `bounds`
+    (left, top, right, bottom) currently on screen.
     """
-    screen_rect = pygame.display.get_surface().get_rect()
-
     total_vertices_needed = len(og_vertices) * times
     total_vertices_available = VERTEX_LIMIT - len(og_vertices)
     if total_vertices_needed > total_vertices_available:
@@ -197,7 +235,7 @@ def duplicate_graph(og_vertices, og_edges, spacing=(70, 70), times=1):
     def is_valid_placement(candidate_positions):
         return (
             is_clear_position(og_vertices + all_new_vertices, candidate_positions)
-            and is_within_screen_margin(candidate_positions, screen_rect, *spacing)
+            and is_within_bounds(candidate_positions, bounds, *spacing)
         )
 
     def get_fallback_offset_positions():
@@ -241,7 +279,7 @@ def duplicate_graph(og_vertices, og_edges, spacing=(70, 70), times=1):
         return [Edge(name_map[e.start.name], name_map[e.end.name], e.value) for e in og_edges]
 
     cell_w, cell_h = get_bounding_box_padding()
-    max_cols = max(1, screen_rect.width // cell_w)
+    max_cols = max(1, int((bounds[2] - bounds[0]) // cell_w))
 
     all_new_vertices, all_new_edges = [], []
     existing_names = {v.name for v in og_vertices}
@@ -0,0 +1,243 @@
+import gc
+import json
+import math
+import mmap
+import string
+import struct
+import sys
+from array import array
+from operator import attrgetter
+
+from graph import Vertex, Edge
+
+# Binary layout (little-endian), every section padded to 8 bytes:
+#   header        magic, format version, flags, vertex count, edge count, name table size
+#   name table    UTF-8 vertex names separated by NUL bytes
+#   positions     float32 x, y per vertex
+#   edge sources  int32 vertex index per edge
+#   edge targets  int32 vertex index per edge
+#   weights       float64 per edge, NaN for unlabeled edges
+BINARY_MAGIC = b"GTVG"
+BINARY_VERSION = 1
+BINARY_EXTENSION = ".gtvg"
+_HEADER = struct.Struct("<4sHHIIQ")
+_DIRECTED = 1
+_SHOW_WEIGHTS = 2
+
+
+def _padded(size):
+    return (size + 7) & ~7
+
+
+def _little_endian(arr):
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+class GraphFile:
+    """
+    Contents of a binary graph file as flat arrays: `names[i]` is vertex i,
+    `positions[2 * i:2 * i + 2]` its coordinates, and edge j runs from
+    `edge_src[j]` to `edge_dst[j]` with weight `edge_w[j]` (NaN = no label).
+    """
+
+    def __init__(self, names, positions, edge_src, edge_dst, edge_w, directed, show_weights):
+        self.names = names
+        self.positions = positions
+        self.edge_src = edge_src
+        self.edge_dst = edge_dst
+        self.edge_w = edge_w
+        self.directed = directed
+        self.show_weights = show_weights
+
+
+def _weight(value):
+    """Stored weight of an edge label; only unlabeled edges are stored as NaN."""
+    if value is None:
+        return math.nan
+    try:
+        weight = float(value)
+    except (TypeError, ValueError):
+        weight = math.nan
+    if weight != weight:
+        raise ValueError(f"Edge label {value!r} is not a number; save as JSON to keep it")
+    return weight
+
+
+def _label(weight):
+    """Edge label for a stored weight; integral weights come back as "3", not "3.0"."""
+    if weight != weight:
+        return None
+    return str(int(weight)) if weight.is_integer() else repr(weight)
+
+
+def save_graph_binary(vertices, edges, directed=False, show_weights=False, filename="graph" + BINARY_EXTENSION):
+    """Write the graph section by section, without building an intermediate document."""
+    if len({v.name for v in vertices}) != len(vertices):
+        raise ValueError("Vertex names must be unique")
+    if any("\0" in v.name for v in vertices):
+        raise ValueError("Vertex names cannot contain NUL characters")
+    names = "\0".join(v.name for v in vertices).encode("utf-8")
+
+    index = {v: i for i, v in enumerate(vertices)}
+    weights = {}
+    for e in edges:
+        if e.value not in weights:
+            weights[e.value] = _weight(e.value)
+
+    flags = (_DIRECTED if directed else 0) | (_SHOW_WEIGHTS if show_weights else 0)
+    sections = (
+        array("f", [c for v in vertices for c in v.pos[:2]]),
+        array("i", map(index.__getitem__, map(attrgetter("start"), edges))),
+        array("i", map(index.__getitem__, map(attrgetter("end"), edges))),
+        array("d", map(weights.__getitem__, map(attrgetter("value"), edges))),
+    )
+    with open(filename, "wb") as f:
+        f.write(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, flags, len(vertices), len(edges), len(names)))
+        f.write(b"\0" * (_padded(_HEADER.size) - _HEADER.size))
+        for chunk in (names, *(_little_endian(section) for section in sections)):
+            size = len(chunk) * (chunk.itemsize if isinstance(chunk, array) else 1)
+            f.write(chunk)
+            f.write(b"\0" * (_padded(size) - size))
+
+
+def read_graph_binary(filename):
+    """Memory-map a binary graph file, validate it and return a GraphFile."""
+    with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if len(data) < _HEADER.size:
+            raise ValueError("File too short for a graph header")
+        magic, version, flags, n, m, names_size = _HEADER.unpack_from(data)
+        if magic != BINARY_MAGIC:
+            raise ValueError("Not a binary graph file")
+        if version != BINARY_VERSION:
+            raise ValueError(f"Unsupported binary graph version {version}")
+
+        layout = [("names", "B", names_size), ("positions", "f", 2 * n),
+                  ("edge_src", "i", m), ("edge_dst", "i", m), ("edge_w", "d", m)]
+        offset = _padded(_HEADER.size)
+        expected = offset + sum(_padded(array(code).itemsize * count) for _, code, count in layout)
+        if len(data) != expected:
+            raise ValueError(f"File size {len(data)} does not match its header ({expected} bytes)")
+
+        sections = {}
+        view = memoryview(data)
+        try:
+            for name, code, count in layout:
+                size = array(code).itemsize * count
+                if code == "B":
+                    sections[name] = bytes(view[offset:offset + size])
+                else:
+                    section = array(code)
+                    section.frombytes(view[offset:offset + size])
+                    sections[name] = _little_endian(section)
+                offset += _padded(size)
+        finally:
+            view.release()
+
+    names = sections["names"].decode("utf-8").split("\0") if n else []
+    if len(names) != n or len(set(names)) != n:
+        raise ValueError("Vertex name table is corrupt")
+    edge_src, edge_dst = sections["edge_src"], sections["edge_dst"]
+    if m and (min(min(edge_src), min(edge_dst)) < 0 or max(max(edge_src), max(edge_dst)) >= n):
+        raise ValueError("Edge endpoint out of range")
+
+    return GraphFile(names, sections["positions"], edge_src, edge_dst, sections["edge_w"],
+                     bool(flags & _DIRECTED), bool(flags & _SHOW_WEIGHTS))
+
+
+def load_graph_binary(filename, vertices, edges):
+    """Replace the contents of `vertices`/`edges`; returns (names, directed, show_weights)."""
+    data = read_graph_binary(filename)
+    labels = {}
+    values = []
+    for w in data.edge_w:
+        if w != w:
+            values.append(None)
+            continue
+        label = labels.get(w)
+        if label is None:
+            label = labels[w] = _label(w)
+        values.append(label)
+
+    # Allocating ~100k objects would otherwise trigger repeated full collections
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        positions = data.positions
+        loaded = [Vertex((positions[2 * i], positions[2 * i + 1]), name) for i, name in enumerate(data.names)]
+        vertices.clear()
+        vertices.extend(loaded)
+        edges.clear()
+        edges.extend(map(Edge, map(loaded.__getitem__, data.edge_src), map(loaded.__getitem__, data.edge_dst),
+                         values))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return set(data.names), data.directed, data.show_weights
+
+
+def save_graph_json(vertices, edges, directed=False, show_weights=False, filename="graph.json"):
+    with open(filename, "w") as f:
+        json.dump({
+            "directed": directed,
+            "show_weights": show_weights,
+            "vertices": [{"name": v.name, "pos": v.pos} for v in vertices],
+            "edges": [{"start": e.start.name, "end": e.end.name, "value": e.value} for e in edges]
+        }, f)
+
+
+def load_graph_json(filename, vertices, edges):
+    with open(filename, "r") as f:
+        data = json.load(f)
+
+    if "vertices" not in data or "edges" not in data:
+        raise ValueError("Invalid file format")
+
+    directed = data.get("directed", False)
+    show_weights = data.get("show_weights", False)
+
+    name_map = {
+        v["name"]: Vertex(v["pos"], v["name"])
+        for v in data["vertices"]
+    }
+
+    vertices.clear()
+    vertices.extend(name_map.values())
+    edges.clear()
+    edges.extend(
+        Edge(name_map[e["start"]], name_map[e["end"]], str(e.get("value")) if e.get("value") is not None else None)
+        for e in data["edges"]
+    )
+    return set(name_map), directed, show_weights
+
+
+def save_graph(vertices, edges, directed=False, show_weights=False, filename="graph.json"):
+    """Save as binary when `filename` ends in .gtvg, otherwise as JSON. Returns True on success."""
+    try:
+        if filename.endswith(BINARY_EXTENSION):
+            save_graph_binary(vertices, edges, directed, show_weights, filename)
+        else:
+            save_graph_json(vertices, edges, directed, show_weights, filename)
+        return True
+
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Failed to save graph to '{filename}': {e}")
+        return False
+
+
+def load_graph(filename, vertices, edges):
+    """
+    Load a .gtvg or JSON graph into `vertices`/`edges`. Returns an iterator over
+    the unused single-letter names, the directed flag and the show-weights flag.
+    """
+    try:
+        if filename.endswith(BINARY_EXTENSION):
+            names, directed, show_weights = load_graph_binary(filename, vertices, edges)
+        else:
+            names, directed, show_weights = load_graph_json(filename, vertices, edges)
+        return iter(name for name in string.ascii_uppercase if name not in names), directed, show_weights
+
+    except Exception as e:
+        print(f"[ERROR] Failed to load graph from '{filename}': {e}")
+        return iter(string.ascii_uppercase), False, False
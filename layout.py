@@ -0,0 +1,250 @@
+import math
+import time
+from array import array
+
+from config import LAYOUT_FRAME_BUDGET_MS, LAYOUT_THETA
+from utils import graph_version
+
+# Quadtree cells stop splitting at this depth, so coincident vertices share a leaf
+MAX_DEPTH = 24
+
+
+class QuadTree:
+    """
+    Barnes–Hut quadtree over point positions. Each node stores the total mass
+    and center of mass of the points below it, so the repulsion of a distant
+    cluster is computed from one node instead of every member.
+
+    With a `deadline` (a time.perf_counter() value) construction stops once it
+    passes; `build()` resumes it, and the tree is usable once `build()` returns True.
+    """
+
+    def __init__(self, xs, ys, deadline=None):
+        self.xs = xs
+        self.ys = ys
+        self.mass = []      # points under the node
+        self.cx = []        # center of mass
+        self.cy = []
+        self.size = []      # side length of the node's square
+        self.children = []  # tuple of child node ids, or None for a leaf
+        self.point = []     # the single point of a one-point leaf, else -1
+        self._pending = []  # nodes whose points are not split yet
+        if xs:
+            x0, y0 = min(xs), min(ys)
+            side = max(max(xs) - x0, max(ys) - y0, 1.0)
+            self._pending.append((self._add(), list(range(len(xs))), x0, y0, side, 0))
+        self.build(deadline)
+
+    def build(self, deadline=None):
+        """Split pending nodes until the tree is complete (returns True) or `deadline` passes."""
+        xs, ys, stack = self.xs, self.ys, self._pending
+        while stack:
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            node, points, x0, y0, side, depth = stack.pop()
+            self.mass[node] = len(points)
+            self.cx[node] = sum(xs[i] for i in points) / len(points)
+            self.cy[node] = sum(ys[i] for i in points) / len(points)
+            self.size[node] = side
+            if len(points) == 1:
+                self.point[node] = points[0]
+                continue
+            if depth == MAX_DEPTH:
+                continue
+
+            half = side / 2
+            mx, my = x0 + half, y0 + half
+            quadrants = ([], [], [], [])
+            for i in points:
+                quadrants[(xs[i] >= mx) + 2 * (ys[i] >= my)].append(i)
+            children = []
+            for q, members in enumerate(quadrants):
+                if members:
+                    child = self._add()
+                    children.append(child)
+                    stack.append((child, members, mx if q & 1 else x0, my if q & 2 else y0, half, depth + 1))
+            self.children[node] = tuple(children)
+        return True
+
+    def _add(self):
+        self.mass.append(0)
+        self.cx.append(0.0)
+        self.cy.append(0.0)
+        self.size.append(0.0)
+        self.children.append(None)
+        self.point.append(-1)
+        return len(self.mass) - 1
+
+    def repulsion(self, i, x, y, k2, theta2):
+        """Fruchterman–Reingold repulsion k²/d from every other point, as a (dx, dy) displacement."""
+        fx = fy = 0.0
+        if not self.mass:
+            return fx, fy
+        mass, cx, cy, size, children, point = self.mass, self.cx, self.cy, self.size, self.children, self.point
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if point[node] == i:
+                continue
+            dx = x - cx[node]
+            dy = y - cy[node]
+            d2 = dx * dx + dy * dy
+            kids = children[node]
+            if kids is None or size[node] * size[node] < theta2 * d2:
+                if d2 < 0.01:
+                    # Coincident points: push apart in a fixed, index-dependent direction
+                    dx, dy, d2 = math.cos(i), math.sin(i), 1.0
+                f = k2 * mass[node] / d2
+                fx += dx * f
+                fy += dy * f
+            else:
+                stack.extend(kids)
+        return fx, fy
+
+
+class ForceLayout:
+    """
+    Incremental Fruchterman–Reingold layout. One iteration ("sweep") builds a
+    quadtree, computes the displacement of every vertex and then moves them all,
+    capped by a temperature that cools after each sweep. Sweeps are split across
+    frames: every phase of `step()` resumes where the last frame stopped and
+    yields once the frame budget is spent, returning the vertices it moved, so
+    large graphs untangle without stalling the frame loop. The layout stops once it has cooled down and
+    reheats when the graph is edited.
+    """
+
+    def __init__(self, vertices, edges, cooling=0.95, gravity=0.02):
+        self.vertices = vertices
+        self.edges = edges
+        self.cooling = cooling
+        self.gravity = gravity
+        self.enabled = False
+        self.temperature = 0.0
+        self._version = None
+        self._sweep = None
+
+    def toggle(self, bounds):
+        self.enabled = not self.enabled
+        if self.enabled:
+            self.start(bounds)
+
+    def start(self, bounds):
+        """(Re)start from a hot temperature inside the world `bounds` (left, top, right, bottom)."""
+        self.bounds = tuple(bounds)
+        self.temperature = (self.bounds[2] - self.bounds[0]) / 10
+        self._version = None
+        self._sweep = None
+
+    @property
+    def running(self):
+        return self.enabled and self.temperature > 0.5
+
+    def _begin_sweep(self, deadline):
+        vertices = self.vertices
+        index = {v: i for i, v in enumerate(vertices)}
+        xs = array("d", (float(v.pos[0]) for v in vertices))
+        ys = array("d", (float(v.pos[1]) for v in vertices))
+        left, top, right, bottom = self.bounds
+        w, h = right - left, bottom - top
+        n = max(1, len(vertices))
+        self._sweep = {
+            "xs": xs, "ys": ys,
+            "edges": [(index[e.start], index[e.end]) for e in self.edges if e.start is not e.end],
+            "tree": QuadTree(xs, ys, deadline),
+            "k": 0.75 * math.sqrt(w * h / n),
+            "center": (left + w / 2, top + h / 2),
+            "dx": array("d", bytes(8 * len(vertices))),
+            "dy": array("d", bytes(8 * len(vertices))),
+            "next": 0,
+            "next_edge": 0,
+            "next_move": 0,
+        }
+
+    def _attract(self, deadline):
+        """Attraction along the edges; returns True once every edge is done."""
+        sweep = self._sweep
+        xs, ys, dx, dy, k = sweep["xs"], sweep["ys"], sweep["dx"], sweep["dy"], sweep["k"]
+        edges = sweep["edges"]
+        j = sweep["next_edge"]
+        while j < len(edges):
+            if j % 256 == 0 and time.perf_counter() > deadline:
+                break
+            a, b = edges[j]
+            j += 1
+            ex = xs[a] - xs[b]
+            ey = ys[a] - ys[b]
+            f = math.sqrt(ex * ex + ey * ey) / k
+            dx[a] -= ex * f
+            dy[a] -= ey * f
+            dx[b] += ex * f
+            dy[b] += ey * f
+        sweep["next_edge"] = j
+        return j == len(edges)
+
+    def _move(self, deadline):
+        """Gravity, then move each vertex by at most the temperature; cools once all have moved."""
+        sweep = self._sweep
+        xs, ys, dx, dy, k = sweep["xs"], sweep["ys"], sweep["dx"], sweep["dy"], sweep["k"]
+        cx, cy = sweep["center"]
+        gravity = self.gravity * k
+        t = self.temperature
+        vertices = self.vertices
+        moved = []
+        for i in range(sweep["next_move"], len(vertices)):
+            if i % 256 == 0 and time.perf_counter() > deadline:
+                sweep["next_move"] = i
+                return moved
+            mx = dx[i] - gravity * (xs[i] - cx)
+            my = dy[i] - gravity * (ys[i] - cy)
+            length = math.sqrt(mx * mx + my * my)
+            if length < 1e-9:
+                continue
+            # Relative move, so a vertex dragged during the sweep keeps its new position
+            scale = min(length, t) / length
+            v = vertices[i]
+            v.pos[0] += mx * scale
+            v.pos[1] += my * scale
+            moved.append(v)
+        self.temperature *= self.cooling
+        self._sweep = None
+        return moved
+
+    def step(self, budget_ms=LAYOUT_FRAME_BUDGET_MS):
+        """Advance the layout for about `budget_ms`; returns the vertices that moved."""
+        version = graph_version(self.vertices, self.edges)
+        if version != self._version:
+            # Edits invalidate a half-done sweep and warm the layout back up
+            self._version = version
+            self._sweep = None
+            if self.enabled:
+                self.temperature = max(self.temperature, (self.bounds[2] - self.bounds[0]) / 40)
+        if not self.running or not self.vertices:
+            return []
+
+        deadline = time.perf_counter() + budget_ms / 1000
+        if self._sweep is None:
+            self._begin_sweep(deadline)
+        sweep = self._sweep
+        xs, ys, dx, dy, tree = sweep["xs"], sweep["ys"], sweep["dx"], sweep["dy"], sweep["tree"]
+        # Building the tree, repulsion, attraction and the final move each
+        # resume here and yield to the next frame once the budget is spent
+        if not tree.build(deadline):
+            return []
+        k2 = sweep["k"] ** 2
+        theta2 = LAYOUT_THETA ** 2
+        n = len(xs)
+        i = sweep["next"]
+        while i < n:
+            if i % 32 == 0 and time.perf_counter() > deadline:
+                break
+            dx[i], dy[i] = tree.repulsion(i, xs[i], ys[i], k2, theta2)
+            i += 1
+        sweep["next"] = i
+        if i < n or not self._attract(deadline):
+            return []
+        return self._move(deadline)
+
+    def reset(self):
+        self.enabled = False
+        self.temperature = 0.0
+        self._sweep = None
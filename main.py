@@ -1,58 +1,29 @@
 import math
 import sys
 import string
-import json
+
+import pygame
 
 from algorithms import get_all_algorithms, mark_all_algorithms_dirty
 from diagnostics import GraphDiagnostics
 from config import *
-from graph import Vertex, Edge, get_vertex_at_pos, get_edge_at_pos, duplicate_graph, apply_graph_complement
+from config import FONT, DEBUG_FONT, SAVE_BUTTON_RECT, LOAD_BUTTON_RECT, K_INPUT_BOX_RECT, SELECT_ST_BUTTON_RECT, \
+    TOGGLE_DIRECTED_RECT, CLEAR_BUTTON_RECT, COMPLEMENT_BUTTON_RECT, DUPLICATE_BUTTON_RECT, RANDOM_BUTTON_RECT, \
+    LAYOUT_BUTTON_RECT, INCLUDE_ALGO_BUTTON_RECT, DUPLICATE_SLIDER_RECT
+from graph_io import save_graph, load_graph
+from layout import ForceLayout
+from graph import Vertex, Edge, get_vertex_at_pos, get_edge_at_pos, duplicate_graph, apply_graph_complement, \
+    draw_graph_points
 from math_text import clear_math_surface_cache
 from physics import PhysicsSystem
+from scene import SceneLayer, DirtyRegions, graph_render_key, detail_level, edge_in_view, LOD_POINTS, LOD_FULL
+from spatial_hash import SpatialHash
+from solver_pool import shutdown_solver_pool
 from np_problems import get_all_problems, mark_all_problems_dirty
 from utils import generate_color_for_index, update_k_value_from_input, get_next_available_vertex_name, draw_fps, \
     deduplicate_edges_for_undirected, generate_random_graph
 from zoom_manager import ZoomManager
-from utils import append_vertex_name_char, backspace_vertex_name
-
-def save_graph(vertices, edges, directed=False, show_weights=False, filename="graph.json"):
-    with open(filename, "w") as f:
-        json.dump({
-            "directed": directed,
-            "show_weights": show_weights,
-            "vertices": [{"name": v.name, "pos": v.pos} for v in vertices],
-            "edges": [{"start": e.start.name, "end": e.end.name, "value": e.value} for e in edges]
-        }, f)
-
-def load_graph(filename, vertices, edges):
-    try:
-        with open(filename, "r") as f:
-            data = json.load(f)
-
-        if "vertices" not in data or "edges" not in data:
-            raise ValueError("Invalid file format")
-
-        directed = data.get("directed", False)
-        show_weights = data.get("show_weights", False)
-
-        name_map = {
-            v["name"]: Vertex(v["pos"], v["name"])
-            for v in data["vertices"]
-        }
-
-        vertices.clear()
-        vertices.extend(name_map.values())
-        edges.clear()
-        edges.extend(
-            Edge(name_map[e["start"]], name_map[e["end"]], str(e.get("value")) if e.get("value") is not None else None)
-            for e in data["edges"]
-        )
-
-        return iter(name for name in string.ascii_uppercase if name not in name_map), directed, show_weights
-
-    except Exception as e:
-        print(f"[ERROR] Failed to load graph from '{filename}': {e}")
-        return iter(string.ascii_uppercase), False, False
+from utils import append_vertex_name_char, backspace_vertex_name, TrackedList, EdgeList
 
 def draw_button(screen, rect, text, hovered, override_color=None):
     color = override_color if override_color else (BUTTON_HOVER_COLOR if hovered else BUTTON_COLOR)
@@ -179,6 +150,10 @@ def highlight_edges(hovered_problem, members, edges):
                 if {edge.start.name, edge.end.name} == {u, v}:
                     edge.highlight = True
 
+    # 3) EDGE-CUT highlights the edges crossing the cut
+    if name == "EDGE-CUT":
+        highlight_edges_for_algorithms(hovered_problem.edge_members, edges)
+
 def highlight_edges_for_algorithms(members, edges, directed=False):
     members = [item for item in members if isinstance(item, tuple)]
     for u, v in members:
@@ -191,12 +166,13 @@ def highlight_edges_for_algorithms(members, edges, directed=False):
                     edge.highlight = True
 
 
-def reset_all(vertices, edges, algorithms, np_problems, diagnostics, physics):
+def reset_all(vertices, edges, algorithms, np_problems, diagnostics, physics, zoom):
     # Clear vertex and edge containers
     vertices.clear()
     edges.clear()
     clear_math_surface_cache()
-    # Reset simulation and analysis systems
+    # Reset the camera and the simulation and analysis systems
+    zoom.reset()
     physics.reset()
     diagnostics.reset()
 
@@ -209,7 +185,7 @@ def reset_all(vertices, edges, algorithms, np_problems, diagnostics, physics):
         algorithm.reset()
     return None, None, None
 
-def handle_all_buttons(pos, vertices, edges, np_problems, algorithms, diagnostics, directed_state, duplicate_count, physics, show_weights, include_algorithms, source_vertex, target_vertex, k_value, directed):
+def handle_all_buttons(pos, vertices, edges, np_problems, algorithms, diagnostics, directed_state, duplicate_count, physics, show_weights, include_algorithms, source_vertex, target_vertex, k_value, directed, bounds):
     """
     Handles clicks on top-row buttons.
     Returns: (handled: bool, new_directed: bool)
@@ -242,11 +218,11 @@ def handle_all_buttons(pos, vertices, edges, np_problems, algorithms, diagnostic
         return True, directed_state, show_weights, include_algorithms
 
     if SAVE_BUTTON_RECT.collidepoint(pos):
-        save_graph(vertices, edges, directed_state, show_weights=show_weights)
+        save_graph(vertices, edges, directed_state, show_weights=show_weights, filename=GRAPH_FILE)
         return True, directed_state, show_weights, include_algorithms
 
     elif DUPLICATE_BUTTON_RECT.collidepoint(pos):
-        if duplicate_graph(vertices, edges, times=duplicate_count):
+        if duplicate_graph(vertices, edges, bounds, times=duplicate_count):
             mark_all_problems_dirty(np_problems)
             mark_all_algorithms_dirty(algorithms)
             diagnostics.mark_dirty()
@@ -280,7 +256,7 @@ def main():
     panning = False
     last_mouse_pos = None
 
-    vertices, edges = [], []
+    vertices, edges = TrackedList(), EdgeList()
     vertex_names = iter(string.ascii_uppercase)
     selected_vertex = None
     moving_vertex = None
@@ -303,6 +279,13 @@ def main():
 
     diagnostics = GraphDiagnostics(vertices, edges)
     physics = PhysicsSystem(vertices, edges)
+    layout = ForceLayout(vertices, edges)
+    spatial = SpatialHash(vertices, edges)
+    scene = SceneLayer()
+    dirty = DirtyRegions()
+    moved = []
+    last_revisions = None
+    last_pos = None
     drag_start_pos = None
     DRAG_THRESHOLD = 5  # Minimum pixels before treating as a drag
     source_vertex = None
@@ -320,23 +303,40 @@ def main():
                 DUPLICATE_BUTTON_RECT.collidepoint(pos) or
                 COMPLEMENT_BUTTON_RECT.collidepoint(pos) or
                 SELECT_ST_BUTTON_RECT.collidepoint(pos) or
+                LAYOUT_BUTTON_RECT.collidepoint(pos) or
                 INCLUDE_ALGO_BUTTON_RECT.collidepoint(pos))
 
-    def draw_edges_and_vertices():
+    def draw_edges_and_vertices(surface):
+        bounds = zoom.world_bounds(surface.get_rect())
+        level = detail_level(zoom.scale, vertices, bounds)
+        if level == LOD_POINTS:
+            draw_graph_points(surface, vertices, edges, selected_vertex, hovered_vertex, source_vertex, target_vertex,
+                              camera=zoom)
+            return
+
+        labels = level == LOD_FULL
         for edge in edges:
-            is_opposite = any(e.start == edge.end and e.end == edge.start for e in edges if e != edge)
-            offset = math.pi / 18 if is_opposite and directed else 0
+            if not edge_in_view(edge, bounds):
+                continue
+            offset = math.pi / 18 if directed and edges.has_opposite(edge) else 0
             live_val = input_text if input_mode == "edge" and input_target == edge else None
-            edge.draw(screen, directed=directed, offset_angle=offset, show_weight=show_weights, live_value=live_val)
+            edge.draw(surface, directed=directed, offset_angle=offset, show_weight=show_weights and labels,
+                      live_value=live_val, camera=zoom)
 
+        margin = (VERTEX_RADIUS + 2) / zoom.scale
+        left, top, right, bottom = bounds[0] - margin, bounds[1] - margin, bounds[2] + margin, bounds[3] + margin
         for vertex in vertices:
+            if not (left <= vertex.pos[0] <= right and top <= vertex.pos[1] <= bottom):
+                continue
             is_st = vertex == source_vertex or vertex == target_vertex
             live_name = input_text if input_mode == "vertex" and input_target == vertex else None
-            vertex.draw(screen,
+            vertex.draw(surface,
                         selected=(vertex == selected_vertex),
                         hovered=(vertex == hovered_vertex),
                         st_highlight=is_st,
-                        live_name=live_name)
+                        live_name=live_name,
+                        label=labels,
+                        camera=zoom)
 
     def draw_all_buttons():
         save_hovered = SAVE_BUTTON_RECT.collidepoint(pos)
@@ -356,6 +356,8 @@ def main():
         draw_button(screen, DUPLICATE_BUTTON_RECT, "Duplicate", duplicate_hovered)
         draw_button(screen, COMPLEMENT_BUTTON_RECT, "Complement", complement_hovered)
         draw_button(screen, RANDOM_BUTTON_RECT, "Random", random_hovered)
+        layout_text = f"Layout: {'ON' if layout.enabled else 'OFF'}"
+        draw_button(screen, LAYOUT_BUTTON_RECT, layout_text, LAYOUT_BUTTON_RECT.collidepoint(pos))
 
         include_algo_hovered = INCLUDE_ALGO_BUTTON_RECT.collidepoint(pos)
         algo_text = f"Algorithms: {'ON' if include_algorithms else 'OFF'}"
@@ -368,24 +370,42 @@ def main():
         draw_button(screen, SELECT_ST_BUTTON_RECT, st_text, st_hovered, override_color=st_override)
 
 
+    def overlay_regions():
+        """Screen regions drawn over the graph, each with what its pixels depend on."""
+        width, height = screen.get_size()
+        controls = pygame.Rect(0, 0, INCLUDE_ALGO_BUTTON_RECT.right + 10, DUPLICATE_SLIDER_RECT.bottom + 10)
+        problems = pygame.Rect(0, 62, width, len(np_problems) * 20 + 10)
+        bottom_top = min(height - len(diagnostics.info) * 15 - 115, height - len(algorithms) * 20 - 15) - 5
+        bottom = pygame.Rect(0, bottom_top, width, height - bottom_top)
+
+        def hover(rect):
+            return pos if rect.collidepoint(pos) else None
+
+        return [
+            ("controls", controls, (hover(controls), directed, include_algorithms, layout.enabled, duplicate_count, k_value,
+                                    k_input_active, input_text, selecting_st_mode,
+                                    source_vertex and source_vertex.name, target_vertex and target_vertex.name)),
+            ("problems", problems, (hover(problems), include_algorithms, directed, k_value,
+                                    tuple(p.revision for p in np_problems))),
+            ("bottom", bottom, (hover(bottom), include_algorithms, directed, int(clock.get_fps()),
+                                tuple(a.revision for a in algorithms), tuple(diagnostics.info.items()))),
+        ]
+
     while True:
-        screen.fill(BACKGROUND_COLOR)
         pos = pygame.mouse.get_pos()  # Needed outside event loop
 
-        # fast lookup from (u,v) → Edge object
-        edge_map = {
-            (min(e.start.name, e.end.name), max(e.start.name, e.end.name)): e
-            for e in edges
-        }
-
-        hovered_vertex = get_vertex_at_pos(vertices, pos)
+        spatial.sync()
+        world_pos = zoom.to_world(pos)
+        hovered_vertex = get_vertex_at_pos(spatial.vertices_near(world_pos, zoom.scale), pos, zoom)
         if not hovered_vertex:
-            hovered_edge = get_edge_at_pos(edges, pos)
+            hovered_edge = get_edge_at_pos(spatial.edges_near(world_pos, zoom.scale), pos, edges, zoom)
             for e in edges:
                 e.highlight = (e == hovered_edge)
 
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
+                shutdown_solver_pool()
                 pygame.quit(); sys.exit()
 
             elif event.type == pygame.VIDEORESIZE:
@@ -415,8 +435,10 @@ def main():
                     if event.key == pygame.K_RETURN:
                         if input_mode == 'vertex' and input_text and all(v.name != input_text for v in vertices):
                             input_target.name = input_text
+                            vertices.touch()
                         elif input_mode == 'edge':
                             input_target.value = str(int(input_text)) if input_text else None
+                            edges.touch()
                         input_mode = None
                         input_text = ""
                         mark_all_problems_dirty(np_problems)
@@ -442,10 +464,10 @@ def main():
                     slider_dragging = True
                     continue
                 if event.button == 4:  # Scroll up = zoom in
-                    zoom.apply_zoom(zoom_in=True, center=pos, vertices=vertices)
+                    zoom.apply_zoom(zoom_in=True, center=pos)
                     continue
                 elif event.button == 5:  # Scroll down = zoom out
-                    zoom.apply_zoom(zoom_in=False, center=pos, vertices=vertices)
+                    zoom.apply_zoom(zoom_in=False, center=pos)
                     continue
                 elif event.button == 1:  # Left mouse down
                     mouse_down_time = pygame.time.get_ticks()
@@ -477,7 +499,8 @@ def main():
 
                 handled, directed, show_weights, include_algorithms = handle_all_buttons(pos, vertices, edges, np_problems, algorithms, diagnostics, directed,
                                                        duplicate_count, physics, show_weights=show_weights, include_algorithms=include_algorithms,
-                                                                                         source_vertex=source_vertex, target_vertex=target_vertex, k_value=k_value, directed=directed)
+                                                                                         source_vertex=source_vertex, target_vertex=target_vertex, k_value=k_value, directed=directed,
+                                                                                         bounds=zoom.world_bounds(screen.get_rect()))
                 if SELECT_ST_BUTTON_RECT.collidepoint(pos):
                     selecting_st_mode = True
                     source_vertex = None
@@ -498,10 +521,14 @@ def main():
                     diagnostics.mark_dirty()
                     continue
 
+                elif LAYOUT_BUTTON_RECT.collidepoint(pos):
+                    layout.toggle(zoom.world_bounds(screen.get_rect()))
+                    continue
+
                 elif RANDOM_BUTTON_RECT.collidepoint(pos):
                     vertex_names = iter(string.ascii_uppercase)
                     selected_vertex, source_vertex, target_vertex = reset_all(vertices, edges, algorithms, np_problems,
-                                                                              diagnostics, physics)
+                                                                              diagnostics, physics, zoom)
                     source_vertex, target_vertex = None, None
                     selecting_st_mode = False  # optional if you want to cancel selection mode
                     generate_random_graph(vertices, edges, vertex_names)
@@ -512,11 +539,11 @@ def main():
 
                 elif LOAD_BUTTON_RECT.collidepoint(pos):
                     selected_vertex, source_vertex, target_vertex = reset_all(vertices, edges, algorithms, np_problems,
-                                                                              diagnostics, physics)
+                                                                              diagnostics, physics, zoom)
                     source_vertex, target_vertex = None, None
                     selecting_st_mode = False
 
-                    vertex_names, directed, show_weights = load_graph("graph.json", vertices, edges)
+                    vertex_names, directed, show_weights = load_graph(GRAPH_FILE, vertices, edges)
                     mark_all_problems_dirty(np_problems)
                     mark_all_algorithms_dirty(algorithms)
                     diagnostics.mark_dirty()
@@ -524,7 +551,7 @@ def main():
 
                 if handled == "reset":
                     selected_vertex, source_vertex, target_vertex = reset_all(vertices, edges, algorithms, np_problems,
-                                                                              diagnostics, physics)
+                                                                              diagnostics, physics, zoom)
                     source_vertex, target_vertex = None, None
                     selecting_st_mode = False  # optional if you want to cancel selection mode
                     continue
@@ -580,16 +607,7 @@ def main():
                         dragging = False
 
                     elif selected_vertex:
-                        if directed:
-                            already_exists = any(
-                                e.start == selected_vertex and e.end == clicked_vertex
-                                for e in edges
-                            )
-                        else:
-                            already_exists = any(
-                                {e.start, e.end} == {selected_vertex, clicked_vertex}
-                                for e in edges
-                            )
+                        already_exists = edges.find(selected_vertex, clicked_vertex, directed) is not None
 
                         if not already_exists:
                             if len(edges) >= EDGE_LIMIT:
@@ -635,7 +653,7 @@ def main():
                                 else:
                                     name = get_next_available_vertex_name(vertices, vertex_names)
                                     if name:
-                                        new_vertex = Vertex(pos, name)
+                                        new_vertex = Vertex(zoom.to_world(pos), name)
                                         vertices.append(new_vertex)
 
                                         if selected_vertex:
@@ -660,23 +678,35 @@ def main():
                         dragging = True  # Now start dragging
                     if dragging:
                         old_pos = moving_vertex.pos[:]
-                        moving_vertex.pos = list(pos)
-                        physics.velocities[moving_vertex] = [0.0, 0.0]  # Freeze physics interference
+                        moving_vertex.pos = list(zoom.to_world(pos))
+                        physics.stop(moving_vertex)  # Freeze physics interference
                         is_middle = pygame.mouse.get_pressed()[1]  # True if scroll button held
                         strength = scroll_drag_strength if is_middle else 0.02
                         if is_middle:
                             physics.move_component(moving_vertex, moving_vertex.pos, old_pos)
                         else:
                             physics.nudge_neighbors(moving_vertex, moving_vertex.pos, old_pos, strength=strength)
+                        spatial.move([moving_vertex])
 
                 else:
                     if panning and last_mouse_pos:
                         dx = pos[0] - last_mouse_pos[0]
                         dy = pos[1] - last_mouse_pos[1]
-                        for v in vertices:
-                            v.pos[0] += dx
-                            v.pos[1] += dy
+                        zoom.pan(dx, dy)
                         last_mouse_pos = pos
+
+        # Idle frame: no input, no pointer motion, nothing moving and no new solver
+        # results, so the screen is already up to date
+        revisions = tuple(p.revision for p in np_problems) + tuple(a.revision for a in algorithms)
+        if not events and not moved and not layout.running and pos == last_pos and revisions == last_revisions:
+            moved = physics.update()
+            spatial.move(moved)
+            clock.tick(60)
+            continue
+        last_revisions = revisions
+        last_pos = pos
+
+        screen.fill(BACKGROUND_COLOR)
         for v in vertices:
             v.highlight = False
 
@@ -721,7 +751,12 @@ def main():
                 if key == "Bipartite" and diagnostics.info.get("Bipartite") is True:
                     apply_bipartite_highlight(np_problems, vertices, directed)
 
-        draw_edges_and_vertices()
+        # The graph comes from the cached scene layer unless something it shows changed
+        live = (input_mode, input_target, input_text) if input_mode else None
+        scene_changed = scene.render(screen.get_size(), graph_render_key(
+            vertices, edges, directed, show_weights, selected_vertex, hovered_vertex,
+            source_vertex, target_vertex, live, zoom.key), draw_edges_and_vertices)
+        screen.blit(scene.surface, (0, 0))
         draw_all_buttons()
 
         pygame.draw.rect(screen, (100, 100, 100), K_INPUT_BOX_RECT, border_radius=6)
@@ -730,8 +765,15 @@ def main():
         screen.blit(k_label, label_rect)
 
         draw_fps(screen, clock)
-        physics.update()
-        pygame.display.flip()
+        moved = physics.update() + layout.step()
+        spatial.move(moved)
+
+        # Push only the overlay regions that changed unless the graph itself was redrawn
+        dirty_rects = dirty.changed(overlay_regions())
+        if scene_changed:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
         clock.tick(60)
 
 if __name__ == '__main__':
@@ -1,31 +1,178 @@
 import re
 
 import pygame
-import matplotlib.pyplot as plt
-import matplotlib as mpl
 import io
-from config import FONT
+from collections import OrderedDict
+from config import FONT, MATH_SURFACE_CACHE_BYTES, MATH_LABEL_FONTS
 
-# Reset to safe mathtext rendering (built-in math engine)
-mpl.rcParams.update({
-    "text.usetex": False,         # Don't use external LaTeX
-    "font.family": "serif",
-    "mathtext.fontset": "cm",     # Use Computer Modern (LaTeX-style font)
-    "mathtext.rm": "serif",
-})
+_plt = None
 
-_surface_cache = {}
+
+def _pyplot():
+    """matplotlib.pyplot, imported on the first label that actually needs it."""
+    global _plt
+    if _plt is None:
+        import matplotlib as mpl
+        import matplotlib.pyplot as plt
+
+        # Reset to safe mathtext rendering (built-in math engine)
+        mpl.rcParams.update({
+            "text.usetex": False,         # Don't use external LaTeX
+            "font.family": "serif",
+            "mathtext.fontset": "cm",     # Use Computer Modern (LaTeX-style font)
+            "mathtext.rm": "serif",
+        })
+        _plt = plt
+    return _plt
+
+
+
+class SurfaceCache:
+    """
+    LRU cache of rendered surfaces bounded by their pixel memory
+    (width * height * bytes per pixel). Least recently used surfaces are
+    evicted once the total exceeds `max_bytes`; a surface larger than the
+    whole budget is returned to the caller but not kept.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (surface, size in bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, surface):
+        size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (surface, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+_surface_cache = SurfaceCache(MATH_SURFACE_CACHE_BYTES)
 
 def clear_math_surface_cache():
     _surface_cache.clear()
+    _glyphs.clear()
+
+def math_surface_cache_stats():
+    """Hit/miss/eviction counters and memory use of the math label cache."""
+    return _surface_cache.stats()
 
 def wrap_trailing_index(name):
+    if "_" not in name:
+        return name
     return re.sub(r'_(\d+)', r'_{\1}', name)
 
 def unwrap_trailing_index(name):
     return re.sub(r'_\{(\d+)\}', r'_\1', name)
 
 
+# A name or number with optional primes and one subscript (A, A', A_{2}, -3),
+# possibly several separated by commas. Matplotlib is only needed for anything else.
+_SIMPLE_LABEL = re.compile(r"(-?[A-Za-z0-9]+)('*)(?:_\{([A-Za-z0-9]+)\})?('*)")
+_LABEL_SEPARATOR = re.compile(r",(?:\\ | )?")
+
+_native_fonts = {}
+_glyphs = {}  # (char, color, pixel size) -> rendered glyph surface
+
+
+def _native_font(size, italic):
+    font = _native_fonts.get((size, italic))
+    if font is None:
+        font = pygame.font.SysFont(MATH_LABEL_FONTS, size, italic=italic)
+        _native_fonts[(size, italic)] = font
+    return font
+
+
+def _glyph(char, color, size):
+    key = (char, color, size)
+    glyph = _glyphs.get(key)
+    if glyph is None:
+        # Letters are italic like math-mode variables; digits and punctuation upright
+        font = _native_font(size, char.isalpha())
+        if char in "\u2032\u2212" and font.metrics(char)[0] is None:
+            char = "'" if char == "\u2032" else "-"  # font lacks prime/minus signs
+        glyph = font.render(char, True, color)
+        _glyphs[key] = glyph
+    return glyph
+
+
+def _parse_simple_label(text):
+    """Return [(base, primes, subscript)] for a simple label, or None."""
+    if text.isalnum():
+        return [(text, 0, "")]
+    parts = []
+    for token in _LABEL_SEPARATOR.split(text):
+        match = _SIMPLE_LABEL.fullmatch(token)
+        if match is None:
+            return None
+        base, primes, sub, trailing = match.groups()
+        parts.append((base, len(primes) + len(trailing), sub or ""))
+    return parts
+
+
+def _render_simple_label(parts, color, size):
+    """Compose a label from cached glyphs, with subscripts and primes at reduced size."""
+    small = max(1, round(size * 0.7))
+    ascent = _native_font(size, True).get_ascent()
+    sub_y = ascent + round(size * 0.2) - _native_font(small, False).get_ascent()
+
+    placed = []  # (glyph, x, y)
+    x = 0
+    for i, (base, primes, sub) in enumerate(parts):
+        if i:
+            comma = _glyph(",", color, size)
+            placed.append((comma, x, 0))
+            x += comma.get_width() + size // 3
+        for char in base.replace("-", "\u2212"):
+            glyph = _glyph(char, color, size)
+            placed.append((glyph, x, 0))
+            x += glyph.get_width()
+        # Primes sit above the subscript, both starting right after the base
+        sup_x = sub_x = x
+        for _ in range(primes):
+            glyph = _glyph("\u2032", color, small)
+            placed.append((glyph, sup_x, 0))
+            sup_x += glyph.get_width()
+        for char in sub:
+            glyph = _glyph(char, color, small)
+            placed.append((glyph, sub_x, sub_y))
+            sub_x += glyph.get_width()
+        x = max(sup_x, sub_x)
+
+    height = max(glyph.get_height() + y for glyph, _, y in placed)
+    surface = pygame.Surface((max(1, x), height), pygame.SRCALPHA)
+    surface.blits([(glyph, (gx, gy)) for glyph, gx, gy in placed], doreturn=False)
+    return surface
+
+
 def get_math_surface(text, color=(255, 255, 255), dpi=200, fontsize=8):
     text = wrap_trailing_index(text)
     if not text:
@@ -33,10 +180,19 @@ def get_math_surface(text, color=(255, 255, 255), dpi=200, fontsize=8):
 
     key = (text, color, fontsize)
 
-    if key in _surface_cache:
-        return _surface_cache[key]
+    cached = _surface_cache.get(key)
+    if cached is not None:
+        return cached
+
+    parts = _parse_simple_label(text)
+    if parts is not None:
+        # Point size at `dpi`, in pixels, to match what matplotlib would produce
+        surface = _render_simple_label(parts, color, round(fontsize * dpi / 72))
+        _surface_cache.put(key, surface)
+        return surface
 
     try:
+        plt = _pyplot()
         fig = plt.figure(figsize=(0.01, 0.01))
         ax = fig.add_axes([0, 0, 1, 1])
         ax.axis("off")
@@ -49,12 +205,12 @@ def get_math_surface(text, color=(255, 255, 255), dpi=200, fontsize=8):
         plt.close(fig)
 
         surface = pygame.image.load(buf).convert_alpha()
-        _surface_cache[key] = surface
+        _surface_cache.put(key, surface)
         return surface
     except Exception as e:
         print("[Math render fallback]", e)
         fallback = FONT.render(text, True, color)
-        _surface_cache[key] = fallback
+        _surface_cache.put(key, fallback)
         return fallback
 
 def _mpl_color(rgb):
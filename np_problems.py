@@ -1,13 +1,12 @@
-import itertools
 import threading
-import pygame
 
-from config import DEBUG_HOVER_COLOR
-from math_text import get_math_surface
-from functools import lru_cache
-
-from utils import dfs_paths_backtrack, dfs_stack
+from config import DEBUG_HOVER_COLOR, SEARCH_NODE_LIMIT
+from utils import dfs_paths_backtrack
 from utils import GraphState
+from bitset_engines import (max_clique, hamiltonian_path, chromatic_coloring, vertex_cover, min_dominating_set,
+                            max_independent_set, SolverCancelled, SearchTooLarge, check_cancelled)
+from flow import vertex_connectivity, stoer_wagner
+from solver_pool import submit_solver
 
 
 class NPProblem:
@@ -18,61 +17,143 @@ class NPProblem:
         self.k = None
         self.result = (None, [])  # None = still computing
         self.edge_members = []  # store solver-returned edges
+        self.error = None  # shown instead of the result when the last run raised
+        self.optimum = None  # exact optimum some solvers report next to the answer (e.g. ω for CLIQUE)
+        self.optimum_symbol = None
+        self._known_optimum = None  # (graph key, optimum, optimal members or None) from the last run
+        self._known_bounds = None  # (graph key, SearchTooLarge) from the last run that gave up
+        self.revision = 0  # bumped whenever the displayed result changes
         self.needs_update = True
         self.graph_state = GraphState(lambda: self.vertices, lambda: self.edges)
-        self._thread = None
+        self._cancel_run = None
+        self._run_id = 0
+        self._lock = threading.Lock()  # guards publishing results against newer runs
         self._last_state_key = None
         self._render_cache = []  # List of (bounding_rect, surfaces_to_blit)
         self._cached_mouse_pos = None  # Optional: skip repeat hovers on same row
 
     def reset(self):
+        self._cancel()
         self.k = None
         self.result = (None, [])
         self.edge_members = []
+        self.error = None
+        self.optimum = None
+        self._known_optimum = None
+        self._known_bounds = None
+        self.revision += 1
         self.needs_update = True
-        self._thread = None
         self.graph_state.invalidate()
         self._last_state_key = None
 
 
-    def compute(self, k, directed):  # Override in subclasses
+    def compute(self, k, directed, cancel_event=None):  # Override in subclasses
         return False, []
 
-    def _run_compute_thread(self, k, directed):
-        out = self.compute(k, directed)
-        # unpack either (found, verts) or (found, verts, eds)
-        if len(out) == 3:
-            found, verts, eds = out
-            self.result = (found, verts)
-            self.edge_members = eds
-        else:
-            found, verts = out
-            self.result = (found, verts)
+    def answer_from_optimum(self, k, optimum, members):
+        """Result for `k` from a known optimum and optimal members (None if unknown),
+        or None when the solver has to run. Override in solvers whose answer follows from the optimum."""
+        return None
+
+    def answer_from_bounds(self, k, lower_bound, best):
+        """Result for `k` from a search that gave up with `lower_bound` on the optimum
+        and the best solution `best` (vertex names), or None when they do not settle it."""
+        return None
+
+    def _cancel(self):
+        with self._lock:
+            self._run_id += 1  # whatever is still running is stale from now on
+            cancel, self._cancel_run = self._cancel_run, None
+        if cancel is not None:
+            cancel()
+
+    def _publish(self, run_id, out, graph_key=None):
+        out, optimum = out
+        with self._lock:
+            if run_id != self._run_id:
+                return  # superseded by a newer request
+            # unpack either (found, verts) or (found, verts, eds)
+            if len(out) == 3:
+                found, verts, eds = out
+                self.result = (found, verts)
+                self.edge_members = eds
+            else:
+                found, verts = out
+                self.result = (found, verts)
+                self.edge_members = []
+            self.optimum = optimum
+            if graph_key is not None and optimum is not None:
+                known = self._known_optimum
+                members = self.result[1] if self.result[0] else None
+                if known is None or known[0] != graph_key or members is not None:
+                    self._known_optimum = (graph_key, optimum, members)
+            self.revision += 1
+            self.needs_update = False
+
+    def _fail(self, run_id, error, graph_key=None):
+        if isinstance(error, SearchTooLarge) and graph_key is not None:
+            # The bounds hold for every k on this graph; rerunning would only find them again
+            self._known_bounds = (graph_key, error)
+            out = self.answer_from_bounds(self.k, error.lower_bound, error.best)
+            if out is not None:
+                self._publish(run_id, (out, None))
+                return
+        with self._lock:
+            if run_id != self._run_id:
+                return
+            self.result = (False, [])
             self.edge_members = []
-        self.needs_update = False
+            self.error = "Too large" if isinstance(error, SearchTooLarge) else "Failed"
+            self.revision += 1
+            self.needs_update = False
 
     def update(self, k, directed=False, compute_enabled=True):
         if compute_enabled:
-            if self.k != k:
+            state_key = (self.graph_state.version(), k, directed)
+            if state_key != self._last_state_key:
                 self.needs_update = True
             if self.needs_update:
-                self.k = k
-                self.result = (None, [])
+                self._last_state_key = state_key
                 self.needs_update = False
 
-                # Join previous thread if still running
-                if self._thread is not None and self._thread.is_alive():
-                    self._thread.join()
-
-                # Start new compute thread
-                self._thread = threading.Thread(
-                    target=self._run_compute_thread,
-                    args=(k, directed),
-                    daemon=True  # Ensures it doesn't block program exit
-                )
-                self._thread.start()
+                # A known optimum of this graph may already answer the new k
+                graph_key = (state_key[0], directed)
+                known = self._known_optimum
+                out = None
+                if known is not None and known[0] == graph_key:
+                    out = self.answer_from_optimum(k, known[1], known[2])
+                gave_up = None
+                bounds = self._known_bounds
+                if out is None and bounds is not None and bounds[0] == graph_key:
+                    gave_up = bounds[1]
+                    out = self.answer_from_bounds(k, gave_up.lower_bound, gave_up.best)
+
+                # Abandon the previous computation instead of waiting for it
+                self._cancel()
+                with self._lock:
+                    run_id = self._run_id
+                    self.k = k
+                    self.result = (None, [])
+                    self.error = None
+                    self.optimum = None
+                    self.revision += 1
+
+                if out is not None:
+                    self._publish(run_id, (out, None if gave_up else known[1]), graph_key)
+                    return
+                if gave_up is not None:
+                    self._fail(run_id, gave_up)
+                    return
+
+                # Hand a snapshot of the graph to the solver backend
+                self._cancel_run = submit_solver(
+                    solve_problem, type(self), self.graph_state.get_snapshot(), k, directed,
+                    on_done=lambda out: self._publish(run_id, out, graph_key),
+                    on_error=lambda e: self._fail(run_id, e, graph_key))
 
     def render_debug(self, screen, font, k, y, mouse_pos, directed, compute_enabled=True):
+        import pygame
+        from math_text import get_math_surface
         self.update(k, directed, compute_enabled=compute_enabled)
         found, members = self.result
 
@@ -86,11 +167,20 @@ class NPProblem:
         k_input = f"k={k}" if self.name not in ["HAMPATH", "HAMCYCLE", "LONGEST-PATH"] else ""
 
         # Render result
-        if found is None:
+        optimum = ""
+        if found is not None and self.optimum is not None:
+            optimum = rf"\quad {self.optimum_symbol}={self.optimum}"
+        if self.error is not None:
+            result = self.error
+        elif found is None:
             result = "Undefined"
         elif found and members:
-            latex_expr = r",\ ".join(members)
+            latex_expr = r",\ ".join(members) + optimum
             result = get_math_surface(latex_expr, color, fontsize=6)
+        elif found:
+            result = get_math_surface(r"\emptyset" + optimum, color, fontsize=6)
+        elif optimum:
+            result = get_math_surface(r"\mathrm{None}" + optimum, color, fontsize=6)
         else:
             result = "None"
 
@@ -112,68 +202,62 @@ class NPProblem:
 
 
 class IndependentSetSolver(NPProblem):
-    def __init__(self, v, e): super().__init__("INDEPENDENT-SET", v, e)
+    def __init__(self, v, e):
+        super().__init__("INDEPENDENT-SET", v, e)
+        self.optimum_symbol = r"\alpha"
 
-    def compute(self, k, directed=False):
-        if k > len(self.vertices):
+    def compute(self, k, directed=False, cancel_event=None):
+        # Independence ignores direction
+        csr = self.graph_state.get_csr(directed=False)
+        independent = max_independent_set(csr.neighbor_masks(), cancel_event)
+        self.optimum = len(independent)
+        return self.answer_from_optimum(k, self.optimum, [csr.names[i] for i in independent])
+
+    def answer_from_optimum(self, k, optimum, members):
+        # Any independent set of size >= k answers the question; show the largest one
+        if k > optimum:
             return False, []
-
-        adj = self.graph_state.get_adj(directed)
-
-        # Flatten adj into name -> set(name)
-        adj_flat = {u: set(v for v, _ in neighbors) for u, neighbors in adj.items()}
-
-        # Ensure symmetry in undirected case
-        if not directed:
-            for u in list(adj_flat):
-                for v in adj_flat[u]:
-                    adj_flat.setdefault(v, set()).add(u)
-
-        for combo in itertools.combinations(self.vertices, k):
-            names = [v.name for v in combo]
-            if all(n2 not in adj_flat[n1] for i, n1 in enumerate(names) for n2 in names[i + 1:]):
-                return True, names
-
-        return False, []
+        if members is None:
+            return None
+        return True, members
 
 
 class CliqueSolver(NPProblem):
     def __init__(self, v, e):
         super().__init__("CLIQUE", v, e)
+        self.optimum_symbol = r"\omega"
 
-    def compute(self, k, directed=False):
-        if k < 1 or len(self.vertices) < k:
-            return False, []
-
+    def compute(self, k, directed=False, cancel_event=None):
         # Always treat as undirected
-        adj = {v.name: set() for v in self.vertices}
-        for edge in self.edges:
-            adj[edge.start.name].add(edge.end.name)
-            adj[edge.end.name].add(edge.start.name)
-
-        # Try all vertex sets of size k
-        for group in itertools.combinations(self.vertices, k):
-            names = [v.name for v in group]
-            if all(n2 in adj[n1] for n1, n2 in itertools.combinations(names, 2)):
-                return True, names
-
-        return False, []
+        csr = self.graph_state.get_csr(directed=False)
+        clique = max_clique(csr.neighbor_masks(), cancel_event)
+        self.optimum = len(clique)
+        return self.answer_from_optimum(k, self.optimum, [csr.names[i] for i in clique])
+
+    def answer_from_optimum(self, k, optimum, members):
+        # Any clique of size >= k answers the question; show the largest one
+        if k < 1 or k > optimum:
+            return False, []
+        if members is None:
+            return None
+        return True, members
 
 class VertexCoverSolver(NPProblem):
     def __init__(self, v, e): super().__init__("VERTEX-COVER", v, e)
-    def compute(self, k, directed=False):
-        if k > len(self.vertices):
+    def compute(self, k, directed=False, cancel_event=None):
+        # Covering ignores direction; a self-loop can only be covered by its own vertex
+        csr = self.graph_state.get_csr(directed=False)
+        if k > csr.n:
             return False, []
 
-        if k < 1 and self.edges:
+        loops = 0
+        for u, v in zip(csr.edge_src, csr.edge_dst):
+            if u == v:
+                loops |= 1 << u
+        cover = vertex_cover(csr.neighbor_masks(), k, loops, cancel_event)
+        if cover is None:
             return False, []
-
-        edge_set = {(e.start.name, e.end.name) for e in self.edges}
-        for combo in itertools.combinations(self.vertices, k):
-            cover = {v.name for v in combo}
-            if all(e[0] in cover or e[1] in cover for e in edge_set):
-                return True, list(cover)
-        return False, []
+        return True, [csr.names[i] for i in cover]
 
 
 class HamiltonianPathSolver(NPProblem):
@@ -181,183 +265,164 @@ class HamiltonianPathSolver(NPProblem):
         super().__init__("HAMPATH", v, e)
 
     def compute(self, k, directed=False, cancel_event=None):
-        if len(self.vertices) < 2:
+        csr = self.graph_state.get_csr(directed)
+        if csr.n < 2:
             return False, []
-
-        # Map vertex names to indices for bitmasking
-        index_map = {v.name: i for i, v in enumerate(self.vertices)}
-        name_map = {i: v.name for v, i in zip(self.vertices, index_map.values())}
-        n = len(self.vertices)
-
-        # Build adjacency list (indexed)
-        adj, index_map = self.graph_state.get_indexed_adj(directed)
-
-        @lru_cache(maxsize=None)
-        def dp(current, visited):
-            if visited == (1 << n) - 1:
-                return [current]  # path ends here
-
-            for neighbor in adj[current]:
-                if not (visited & (1 << neighbor)):
-                    suffix = dp(neighbor, visited | (1 << neighbor))
-                    if suffix:
-                        return [current] + suffix
-            return []
-
-        # Try starting from each node
-        for start in range(n):
-            path = dp(start, 1 << start)
-            if path and len(path) == n:
-                vert_names = [name_map[i] for i in path]
-                eds = [(vert_names[i], vert_names[i + 1]) for i in range(len(vert_names) - 1)]
-                return True, vert_names, eds
-        return False, [], []
+        path = hamiltonian_path(csr.neighbor_masks(), cancel_event)
+        if not path:
+            return False, [], []
+        vert_names = [csr.names[i] for i in path]
+        eds = [(vert_names[i], vert_names[i + 1]) for i in range(len(vert_names) - 1)]
+        return True, vert_names, eds
 
 
 class KColoringSolver(NPProblem):
     def __init__(self, v, e):
         super().__init__("k-COLORING", v, e)
+        self.optimum_symbol = r"\chi"
 
-    def compute(self, k, directed=False):
+    def compute(self, k, directed=False, cancel_event=None):
         if directed:
             return None, []
 
-        if k < 1 or len(self.vertices) == 0:
+        csr = self.graph_state.get_csr(directed)
+        if csr.n == 0:
             return False, []
 
-        # Build adjacency map
-        adj = self.graph_state.get_adj(directed)
-
-        # Recursive backtracking to try color assignments
-        names = [v.name for v in self.vertices]
-        color_map = {}
-
-        def backtrack(index):
-            if index == len(names):
-                return True  # all nodes colored
-
-            node = names[index]
-            for color in range(k):
-                if all(color_map.get(neigh_name) != color for neigh_name, _ in adj[node]):
-                    color_map[node] = color
-                    if backtrack(index + 1):
-                        return True
-                    del color_map[node]
-            return False
-
-        success = backtrack(0)
-        if success:
-            # Create a sorted color-class output
-            colored_groups = {}
-            for node, color in color_map.items():
-                colored_groups.setdefault(color, []).append(node)
-
-            # Flatten groups for display
-            flat_list = [f"{color}: [{', '.join(group)}]" for color, group in sorted(colored_groups.items())]
-
-            return True, flat_list
-        else:
+        color_map = chromatic_coloring(csr.neighbor_masks(), cancel_event)
+        self.optimum = max(color_map) + 1
+
+        # Create a sorted color-class output
+        colored_groups = {}
+        for node, color in enumerate(color_map):
+            colored_groups.setdefault(color, []).append(csr.names[node])
+
+        # Flatten groups for display
+        flat_list = [f"{color}: [{', '.join(group)}]" for color, group in sorted(colored_groups.items())]
+
+        return self.answer_from_optimum(k, self.optimum, flat_list)
+
+    def answer_from_optimum(self, k, optimum, members):
+        # Any coloring with at most k colors answers the question; show a minimum one
+        if k < optimum:
             return False, []
+        if members is None:
+            return None
+        return True, members
 
 class HamiltonianCycleSolver(NPProblem):
     def __init__(self, v, e):
         super().__init__("HAMCYCLE", v, e)
 
     def compute(self, k, directed=False, cancel_event=None):
-        if len(self.vertices) < 2:
+        csr = self.graph_state.get_csr(directed)
+        n = csr.n
+        if n < 2:
             return False, []
+        adj = [tuple(dict.fromkeys(csr.neighbors(i))) for i in range(n)]
+        adj_sets = csr.neighbor_sets()
+        full = (1 << n) - 1
 
-        index_map = {v.name: i for i, v in enumerate(self.vertices)}
-        name_map = {i: v.name for v, i in zip(self.vertices, index_map.values())}
-        n = len(self.vertices)
-
-        # Build adjacency list (indexed)
-        adj, index_map = self.graph_state.get_indexed_adj(directed)
-
-        @lru_cache(maxsize=None)
-        def dp(current, visited):
-            if visited == (1 << n) - 1:
-                return current in adj[start]  # cycle if can return to start
-
-            for neighbor in adj[current]:
-                if not (visited & (1 << neighbor)):
-                    if dp(neighbor, visited | (1 << neighbor)):
-                        path_map[(visited, current)] = neighbor
-                        return True
-            return False
-
+        # Iterative DFS over (vertex, visited) states; states that cannot be
+        # completed into a cycle are remembered so they are never searched twice
         for start in range(n):
-            path_map = {}
-            if dp(start, 1 << start):
-                # Reconstruct path
-                path = [start]
-                visited = 1 << start
-                curr = start
-                while len(path) < n:
-                    curr = path_map[(visited, curr)]
-                    visited |= 1 << curr
-                    path.append(curr)
-                path.append(start)  # close the cycle
-                vert_names = [name_map[i] for i in path]
-                eds = [(vert_names[i], vert_names[i + 1]) for i in range(len(vert_names) - 1)]
-                return True, vert_names, eds
+            dead = set()
+            path, visited = [start], 1 << start
+            exits = [iter(adj[start])]  # untried neighbors of each path vertex
+            while exits:
+                check_cancelled(cancel_event)
+                current = path[-1]
+                if visited == full and start in adj_sets[current]:
+                    path.append(start)  # close the cycle
+                    vert_names = [csr.names[i] for i in path]
+                    eds = [(vert_names[i], vert_names[i + 1]) for i in range(len(vert_names) - 1)]
+                    return True, vert_names, eds
+
+                step = next((u for u in exits[-1]
+                             if not visited >> u & 1 and (u, visited | 1 << u) not in dead), None)
+                if step is None:
+                    dead.add((current, visited))
+                    exits.pop()
+                    path.pop()
+                    visited ^= 1 << current
+                    continue
+                path.append(step)
+                visited |= 1 << step
+                exits.append(iter(adj[step]))
         return False, [], []
 
 
 class MinCutSolver(NPProblem):
     def __init__(self, v, e):
         super().__init__("MIN-CUT", v, e)
+        self.optimum_symbol = r"\kappa"
 
-    def compute(self, k, directed=False):
-        from itertools import combinations
-
-        if k >= len(self.vertices) - 1:
+    def compute(self, k, directed=False, cancel_event=None):
+        csr = self.graph_state.get_csr(directed)
+
+        # Directed graphs count as disconnected once they are no longer strongly connected
+        self.optimum, separator = vertex_connectivity(csr, cancel_event)
+        if separator is None:
+            return False, []  # complete graphs and graphs under two vertices cannot be cut
+        return self.answer_from_optimum(k, self.optimum, [csr.names[i] for i in separator])
+
+    def answer_from_optimum(self, k, optimum, members):
+        # Any separator of size <= k answers the question; show a minimum one
+        # (empty when the graph is already disconnected)
+        if k < optimum:
             return False, []
+        if members is None:
+            return None
+        return True, members
 
-        # Build adjacency map
-        adj = self.graph_state.get_adj(directed)
 
-        def is_disconnected(excluded):
-            seen = set()
-            remaining = [v.name for v in self.vertices if v.name not in excluded]
-            if not remaining:
-                return True
+class EdgeCutSolver(NPProblem):
+    def __init__(self, v, e):
+        super().__init__("EDGE-CUT", v, e)
+        self.optimum_symbol = r"\lambda"
 
-            # Build filtered adjacency list with excluded nodes removed
-            adj_filtered = {
-                u: [v for v in adj[u] if v not in excluded]
-                for u in adj if u not in excluded
-            }
+    def compute(self, k, directed=False, cancel_event=None):
+        # Edge cuts ignore direction; edge labels are the weights (unlabeled edges weigh 1)
+        csr = self.graph_state.get_csr(directed=False)
+        if csr.n < 2 or any(w < 0 for w in csr.edge_w):
+            return None, []
 
-            dfs_stack(adj_filtered, remaining[0], seen)
-            return len(seen) < len(remaining)
+        weight, side = stoer_wagner(csr.n, csr.edge_src, csr.edge_dst, csr.edge_w, cancel_event)
+        self.optimum = int(weight) if weight.is_integer() else round(weight, 3)
+        if k < weight:
+            return False, [], []
 
-        # Try all sets of size k
-        for group in combinations(self.vertices, k):
-            names = {v.name for v in group}
-            if is_disconnected(names):
-                return True, list(names)
+        # One side of the cut, and the edges that cross it
+        inside = set(side)
+        names = [csr.names[i] for i in side]
+        cut = [(csr.names[u], csr.names[v])
+               for u, v in zip(csr.edge_src, csr.edge_dst) if (u in inside) != (v in inside)]
+        return True, names, cut
 
-        return False, []
 
 class LongestPathSolver(NPProblem):
     def __init__(self, v, e):
         super().__init__("LONGEST-PATH", v, e)
 
-    def compute(self, k, directed=False):
-        adj = self.graph_state.get_adj(directed)
+    def compute(self, k, directed=False, cancel_event=None):
+        csr = self.graph_state.get_csr(directed)
         longest = []
 
         def on_path_found(path):
             nonlocal longest
+            check_cancelled(cancel_event)
             if len(path) > len(longest):
                 longest = list(path)
 
-        for v in self.vertices:
-            dfs_paths_backtrack(adj, [v.name], {v.name}, on_path_found)
+        visited = bytearray(csr.n)
+        for start in range(csr.n):
+            visited[start] = 1
+            dfs_paths_backtrack(csr, [start], visited, on_path_found)
+            visited[start] = 0
 
         found = len(longest) > 1
         if found:
+            longest = [csr.names[i] for i in longest]
             eds = [(longest[i], longest[i + 1]) for i in range(len(longest) - 1)]
             return True, longest, eds
         return False, [], []
@@ -365,26 +430,44 @@ class LongestPathSolver(NPProblem):
 class DominatingSetSolver(NPProblem):
     def __init__(self, v, e):
         super().__init__("DOMINATING-SET", v, e)
+        self.optimum_symbol = r"\gamma"
 
-    def compute(self, k, directed=False):
-        if k > len(self.vertices):
+    def compute(self, k, directed=False, cancel_event=None):
+        csr = self.graph_state.get_csr(directed)
+        try:
+            dominating = min_dominating_set(csr.neighbor_masks(), cancel_event, SEARCH_NODE_LIMIT)
+        except SearchTooLarge as e:
+            # γ is unknown; the caller answers what the bounds settle from the exception
+            raise SearchTooLarge(e.node_limit, [csr.names[i] for i in e.best], e.lower_bound) from None
+        self.optimum = len(dominating)
+        return self.answer_from_optimum(k, self.optimum, [csr.names[i] for i in dominating])
+
+    def answer_from_optimum(self, k, optimum, members):
+        # Any dominating set of size <= k answers the question; show a minimum one
+        if k < optimum:
             return False, []
+        if members is None:
+            return None
+        return True, members
+
+    def answer_from_bounds(self, k, lower_bound, best):
+        if k >= len(best):
+            return True, best
+        if k < lower_bound:
+            return False, []
+        return None
 
-        adj = self.graph_state.get_adj(directed)
-
-        # Flatten: name -> set of neighbors
-        adj_flat = {u: set(v for v, _ in neighbors) for u, neighbors in adj.items()}
-        all_nodes = {v.name for v in self.vertices}
-
-        for combo in itertools.combinations(self.vertices, k):
-            dom_set = {v.name for v in combo}
-            covered = set(dom_set)
-            for v in dom_set:
-                covered.update(adj_flat.get(v, []))
-            if covered >= all_nodes:
-                return True, list(dom_set)
 
-        return False, []
+def solve_problem(problem_cls, snapshot, k, directed, cancel_event):
+    """Run one solver on a graph snapshot; executed by the solver backend
+    (a worker process or a background thread). Returns None when cancelled."""
+    problem = problem_cls(None, None)
+    problem.graph_state = GraphState.from_snapshot(snapshot)
+    try:
+        out = problem.compute(k, directed, cancel_event=cancel_event)
+    except SolverCancelled:
+        return None
+    return out, problem.optimum
 
 
 def get_all_problems(vertices, edges):
@@ -397,6 +480,7 @@ def get_all_problems(vertices, edges):
         IndependentSetSolver(vertices, edges),
         CliqueSolver(vertices, edges),
         MinCutSolver(vertices, edges),
+        EdgeCutSolver(vertices, edges),
         DominatingSetSolver(vertices,edges)
     ]
 
@@ -1,14 +1,85 @@
-from utils import dfs_stack
+from array import array
+
+from utils import dfs_stack, GraphState, graph_version
+
+# Velocities below this many pixels per frame stop, so the layout comes to rest
+# instead of creeping forever under geometric damping.
+REST_SPEED = 0.05
+DAMPING = 0.75
 
 
 class PhysicsSystem:
+    """
+    Damped drift of vertices after drags. Velocities live in two flat float
+    arrays indexed like the vertex list, and only vertices that are still
+    moving are integrated each frame. Connected-component labels are computed
+    once per graph version, so dragging a whole component is a lookup.
+    """
+
     def __init__(self, vertices, edges):
         self.vertices = vertices
         self.edges = edges
-        self.velocities = {v: [0.0, 0.0] for v in vertices}
+        self.graph_state = GraphState(lambda: self.vertices, lambda: self.edges)
+        self._version = None
+        self._slot = {}          # vertex -> index into the velocity arrays
+        self._vx = array("d")
+        self._vy = array("d")
+        self._active = set()     # slots with a nonzero velocity
+        self._labels = None      # component label per slot, built on demand
+        self._components = None  # label -> slots in that component
+
+    def _sync(self):
+        """Re-index after graph edits, keeping the velocity of surviving vertices."""
+        version = graph_version(self.vertices, self.edges)
+        if version == self._version:
+            return
+        moving = {v: (self._vx[i], self._vy[i]) for v, i in self._slot.items() if i in self._active}
+        self._slot = {v: i for i, v in enumerate(self.vertices)}
+        n = len(self.vertices)
+        self._vx = array("d", bytes(8 * n))
+        self._vy = array("d", bytes(8 * n))
+        self._active = set()
+        for v, (vx, vy) in moving.items():
+            i = self._slot.get(v)
+            if i is not None:
+                self._vx[i], self._vy[i] = vx, vy
+                self._active.add(i)
+        self._labels = None
+        self._components = None
+        self._version = version
+
+    def _component_labels(self):
+        if self._labels is None:
+            csr = self.graph_state.get_csr(directed=False)
+            labels = array("l", [-1]) * csr.n
+            components = []
+            visited = bytearray(csr.n)
+            for start in range(csr.n):
+                if not visited[start]:
+                    members = dfs_stack(csr, start, visited)
+                    for i in members:
+                        labels[i] = len(components)
+                    components.append(members)
+            self._labels = labels
+            self._components = components
+        return self._labels
 
     def rebuild(self):
-        self.velocities = {v: [0.0, 0.0] for v in self.vertices}
+        self._version = None
+        self._sync()
+
+    def _push(self, slot, dx, dy):
+        self._vx[slot] += dx
+        self._vy[slot] += dy
+        self._active.add(slot)
+
+    def stop(self, vertex):
+        """Zero the velocity of `vertex`, e.g. while it is held by the mouse."""
+        self._sync()
+        i = self._slot.get(vertex)
+        if i is not None:
+            self._vx[i] = self._vy[i] = 0.0
+            self._active.discard(i)
 
     def move_component(self, anchor_vertex, new_pos, old_pos, strength=0.25):
         dx = new_pos[0] - old_pos[0]
@@ -16,27 +87,30 @@ class PhysicsSystem:
         if dx == 0 and dy == 0:
             return
 
-        connected_vertices = self.get_connected_component(anchor_vertex)
-        for v in connected_vertices:
-            if v not in self.velocities:
-                self.velocities[v] = [0.0, 0.0]
-            self.velocities[v][0] += dx * strength
-            self.velocities[v][1] += dy * strength
+        self._sync()
+        i = self._slot.get(anchor_vertex)
+        if i is None:
+            return
+        label = self._component_labels()[i]
+        dx *= strength
+        dy *= strength
+        for j in self._components[label]:
+            self._push(j, dx, dy)
 
     def get_connected(self, vertex):
-        connected = set()
-        for e in self.edges:
-            if e.start == vertex:
-                connected.add(e.end)
-            elif e.end == vertex:
-                connected.add(e.start)
-        return connected
+        csr = self.graph_state.get_csr(directed=False)
+        i = csr.index.get(vertex.name)
+        if i is None:
+            return set()
+        return {self.vertices[j] for j in csr.neighbors(i)}
 
     def get_connected_component(self, start_vertex):
-        visited = set()
-        adj = {v: self.get_connected(v) for v in self.vertices}
-        dfs_stack(adj, start_vertex, visited)
-        return visited
+        self._sync()
+        i = self._slot.get(start_vertex)
+        if i is None:
+            return {start_vertex}
+        label = self._component_labels()[i]
+        return {self.vertices[j] for j in self._components[label]}
 
     def nudge_neighbors(self, moved_vertex, new_pos, old_pos, strength=0.02):
         dx = new_pos[0] - old_pos[0]
@@ -44,24 +118,33 @@ class PhysicsSystem:
         if dx == 0 and dy == 0:
             return
 
+        self._sync()
         for neighbor in self.get_connected(moved_vertex):
-            if neighbor not in self.velocities:
-                self.velocities[neighbor] = [0.0, 0.0]
-            self.velocities[neighbor][0] += dx * strength
-            self.velocities[neighbor][1] += dy * strength
+            self._push(self._slot[neighbor], dx * strength, dy * strength)
 
     def update(self):
-        damping = 0.75
-        for v in self.vertices:
-            if v in self.velocities:
-                vx, vy = self.velocities[v]
-                if vx == 0.0 and vy == 0.0:
-                    continue
-
-                v.pos[0] += vx
-                v.pos[1] += vy
-                self.velocities[v][0] *= damping
-                self.velocities[v][1] *= damping
+        """Advance one step; returns the vertices that moved."""
+        self._sync()
+        if not self._active:
+            return []
+        vertices, vx, vy = self.vertices, self._vx, self._vy
+        moved = []
+        resting = []
+        for i in sorted(self._active):
+            x, y = vx[i], vy[i]
+            pos = vertices[i].pos
+            pos[0] += x
+            pos[1] += y
+            x *= DAMPING
+            y *= DAMPING
+            if -REST_SPEED < x < REST_SPEED and -REST_SPEED < y < REST_SPEED:
+                x = y = 0.0
+                resting.append(i)
+            vx[i] = x
+            vy[i] = y
+            moved.append(vertices[i])
+        self._active.difference_update(resting)
+        return moved
 
     def reset(self):
-        self.__init__(self.vertices, self.edges)
\ No newline at end of file
+        self.__init__(self.vertices, self.edges)
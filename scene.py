@@ -0,0 +1,96 @@
+import math
+
+import pygame
+
+from config import LOD_POINT_SPACING, LOD_LABEL_SPACING, LOD_LABEL_MIN_SCALE
+
+# Levels of detail, from cheapest to full
+LOD_POINTS = 0  # one-pixel edges, small squares, no labels or arrowheads
+LOD_SHAPES = 1  # edges with arrowheads and outlined circles, no labels
+LOD_FULL = 2    # everything, including vertex names and edge weights
+
+
+class SceneLayer:
+    """
+    Retained drawing of the graph (edges, arrowheads, vertices and labels)
+    on a transparent offscreen surface. The frame loop passes a render key
+    describing everything the drawing depends on; the layer is redrawn only
+    when that key changes and is otherwise blitted as is.
+    """
+
+    def __init__(self):
+        self.surface = None
+        self._key = None
+
+    def invalidate(self):
+        self._key = None
+
+    def render(self, size, key, draw):
+        """Redraw through `draw(surface)` if `key` or `size` changed; returns True when it did."""
+        if self.surface is None or self.surface.get_size() != size:
+            self.surface = pygame.Surface(size, pygame.SRCALPHA)
+            self._key = None
+        if key == self._key:
+            return False
+        self.surface.fill((0, 0, 0, 0))
+        draw(self.surface)
+        self._key = key
+        return True
+
+
+def graph_render_key(vertices, edges, directed, show_weights, selected, hovered, source, target, live,
+                     camera=(1.0, 0.0, 0.0)):
+    """Everything the graph drawing depends on; equal keys draw identical pixels."""
+    return (
+        directed, show_weights, selected, hovered, source, target, live, camera,
+        tuple((v.name, v.pos[0], v.pos[1], v.highlight, v.custom_color) for v in vertices),
+        tuple((e.start.name, e.end.name, e.value, e.highlight) for e in edges),
+    )
+
+
+def detail_level(scale, vertices, bounds):
+    """
+    Level of detail for the vertices inside the world `bounds` (left, top,
+    right, bottom) shown at zoom `scale`, from the average screen spacing
+    between visible vertices.
+    """
+    left, top, right, bottom = bounds
+    visible = sum(1 for v in vertices if left <= v.pos[0] < right and top <= v.pos[1] < bottom)
+    if not visible:
+        return LOD_FULL
+    spacing = scale * math.sqrt((right - left) * (bottom - top) / visible)
+    if spacing < LOD_POINT_SPACING:
+        return LOD_POINTS
+    if spacing < LOD_LABEL_SPACING or scale < LOD_LABEL_MIN_SCALE:
+        return LOD_SHAPES
+    return LOD_FULL
+
+
+def edge_in_view(edge, bounds):
+    """Whether the bounding box of `edge` overlaps the world `bounds` (left, top, right, bottom)."""
+    (x1, y1), (x2, y2) = edge.start.pos, edge.end.pos
+    left, top, right, bottom = bounds
+    return min(x1, x2) < right and max(x1, x2) >= left and min(y1, y2) < bottom and max(y1, y2) >= top
+
+
+class DirtyRegions:
+    """
+    Remembers a signature per screen region between frames and reports the
+    rectangles whose signature changed, for pygame.display.update.
+    """
+
+    def __init__(self):
+        self._keys = {}
+
+    def reset(self):
+        self._keys.clear()
+
+    def changed(self, regions):
+        """`regions` holds (name, rect, signature) triples; returns the rects that need updating."""
+        rects = []
+        for name, rect, signature in regions:
+            key = (tuple(rect), signature)
+            if self._keys.get(name) != key:
+                self._keys[name] = key
+                rects.append(rect)
+        return rects
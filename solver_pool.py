@@ -0,0 +1,142 @@
+import itertools
+import threading
+
+from bitset_engines import SolverCancelled
+from config import SOLVER_BACKEND, SOLVER_PROCESSES
+
+# Each running task owns a slot holding its task id; writing anything else
+# into the slot tells the worker to stop.
+_SLOTS = 1024
+_worker_flags = None
+
+
+def _init_worker(flags):
+    global _worker_flags
+    _worker_flags = flags
+
+
+class SharedCancel:
+    """threading.Event stand-in for worker processes: set once the task's slot is cleared or reused."""
+
+    def __init__(self, slot, task_id):
+        self.slot = slot
+        self.task_id = task_id
+
+    def is_set(self):
+        return _worker_flags[self.slot] != self.task_id
+
+
+class SolverPool:
+    def __init__(self, processes=None):
+        # Imported here so that modules submitting work stay cheap to import
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Start workers from a fresh interpreter: forking would copy the SDL state
+        # and the locks held by this process's solver and executor threads
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._flags = context.Array("q", _SLOTS, lock=False)
+        self._executor = ProcessPoolExecutor(max_workers=processes, mp_context=context,
+                                             initializer=_init_worker, initargs=(self._flags,))
+        self._task_ids = itertools.count(1)
+
+    def submit(self, fn, *args):
+        """Run `fn(*args, cancel_event)` in a worker; returns (future, cancel)."""
+        task_id = next(self._task_ids)
+        slot = task_id % _SLOTS
+        self._flags[slot] = task_id
+        future = self._executor.submit(fn, *args, SharedCancel(slot, task_id))
+
+        def cancel():
+            future.cancel()
+            if self._flags[slot] == task_id:
+                self._flags[slot] = -1
+        return future, cancel
+
+    def shutdown(self):
+        for slot in range(_SLOTS):
+            self._flags[slot] = -1
+        self._executor.shutdown(wait=False)
+
+
+_pool = None
+_pool_failed = False
+
+
+def get_solver_pool():
+    """The shared process pool, or None when solvers should run in threads."""
+    global _pool, _pool_failed
+    if SOLVER_BACKEND != "process" or _pool_failed:
+        return None
+    if _pool is None:
+        try:
+            _pool = SolverPool(SOLVER_PROCESSES)
+        except (OSError, ImportError, NotImplementedError, ValueError) as e:
+            print(f"[INFO] Process solver backend unavailable ({e}); using threads.")
+            _pool_failed = True
+    return _pool
+
+
+def shutdown_solver_pool():
+    """Cancel every worker task and release the pool (call before exiting)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+def submit_solver(fn, *args, on_done, on_error=None):
+    """
+    Run `fn(*args, cancel_event)` on the configured backend and call
+    `on_done(result)` from a background thread once it returns, or
+    `on_error(exception)` if it raised. `fn` must be a picklable module-level
+    function returning None when it was cancelled. Returns a callable that
+    cancels the run; cancelled runs never report.
+    """
+    global _pool_failed
+    pool = get_solver_pool()
+    if pool is not None:
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            future, cancel = pool.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            print(f"[INFO] Process solver backend failed ({e}); using threads.")
+            _pool_failed = True
+        else:
+            future.add_done_callback(lambda f: _deliver(f, on_done, on_error))
+            return cancel
+
+    cancel_event = threading.Event()
+
+    def run():
+        try:
+            out = fn(*args, cancel_event)
+        except SolverCancelled:
+            return
+        except Exception as e:
+            print(f"[ERROR] Solver failed: {type(e).__name__}: {e}")
+            if on_error is not None and not cancel_event.is_set():
+                on_error(e)
+            return
+        if out is not None and not cancel_event.is_set():
+            on_done(out)
+
+    threading.Thread(target=run, daemon=True).start()
+    return cancel_event.set
+
+
+def _deliver(future, on_done, on_error=None):
+    if future.cancelled():
+        return
+    try:
+        out = future.result()
+    except SolverCancelled:
+        return
+    except Exception as e:
+        print(f"[ERROR] Solver worker failed: {type(e).__name__}: {e}")
+        if on_error is not None:
+            on_error(e)
+        return
+    if out is not None:
+        on_done(out)
@@ -0,0 +1,117 @@
+from collections import defaultdict
+
+from config import VERTEX_RADIUS, EDGE_CLICK_RADIUS
+from utils import graph_version
+
+# Edges are indexed by their bounding box grown by the click radius plus the
+# sideways shift applied to opposite directed edges.
+EDGE_MARGIN = EDGE_CLICK_RADIUS + 5
+
+
+class SpatialHash:
+    """
+    Uniform grid over vertex centers and edge bounding boxes, used to narrow
+    hit-tests down to the few items near the cursor.
+
+    The index rebuilds itself when the graph version changes; position-only
+    changes (dragging, physics, layout) are reported through `move()` or
+    `rebuild()`. Positions are world coordinates, so zoom and pan leave it as is.
+    """
+
+    def __init__(self, vertices, edges, cell_size=64):
+        self.vertices = vertices
+        self.edges = edges
+        self.cell_size = cell_size
+        self._version = None
+        self._vertex_grid = defaultdict(set)
+        self._edge_grid = defaultdict(set)
+        self._vertex_cell = {}
+        self._edge_cells = {}
+        self._incident = defaultdict(list)
+        self._order = {}
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def _cells_in_box(self, x1, y1, x2, y2):
+        cx1, cy1 = self._cell(x1, y1)
+        cx2, cy2 = self._cell(x2, y2)
+        return [(cx, cy) for cx in range(cx1, cx2 + 1) for cy in range(cy1, cy2 + 1)]
+
+    def rebuild(self):
+        self._vertex_grid.clear()
+        self._edge_grid.clear()
+        self._vertex_cell.clear()
+        self._edge_cells.clear()
+        self._incident.clear()
+        self._order = {v: i for i, v in enumerate(self.vertices)}
+        for v in self.vertices:
+            self._insert_vertex(v)
+        for e in self.edges:
+            self._incident[e.start].append(e)
+            self._incident[e.end].append(e)
+            self._insert_edge(e)
+        self._version = graph_version(self.vertices, self.edges)
+
+    def sync(self):
+        """Rebuild if the graph was edited since the last build."""
+        if self._version != graph_version(self.vertices, self.edges):
+            self.rebuild()
+
+    def _insert_vertex(self, v):
+        cell = self._cell(*v.pos)
+        self._vertex_cell[v] = cell
+        self._vertex_grid[cell].add(v)
+
+    def _insert_edge(self, e):
+        (x1, y1), (x2, y2) = e.start.pos, e.end.pos
+        cells = self._cells_in_box(min(x1, x2) - EDGE_MARGIN, min(y1, y2) - EDGE_MARGIN,
+                                   max(x1, x2) + EDGE_MARGIN, max(y1, y2) + EDGE_MARGIN)
+        self._edge_cells[e] = cells
+        for cell in cells:
+            self._edge_grid[cell].add(e)
+
+    def _remove_edge(self, e):
+        for cell in self._edge_cells.pop(e, ()):
+            self._edge_grid[cell].discard(e)
+
+    def move(self, moved):
+        """Re-index vertices whose positions changed, along with their incident edges."""
+        if self._version != graph_version(self.vertices, self.edges):
+            self.rebuild()
+            return
+        touched_edges = set()
+        for v in moved:
+            old = self._vertex_cell.get(v)
+            if old is None:
+                continue
+            new = self._cell(*v.pos)
+            if new != old:
+                self._vertex_grid[old].discard(v)
+                self._vertex_cell[v] = new
+                self._vertex_grid[new].add(v)
+            touched_edges.update(self._incident.get(v, ()))
+        for e in touched_edges:
+            self._remove_edge(e)
+            self._insert_edge(e)
+
+    def vertices_near(self, pos, scale=1.0):
+        """Vertices whose circle may contain the world point `pos` at zoom `scale`, in graph order."""
+        x, y = pos
+        r = VERTEX_RADIUS / scale
+        found = set()
+        for cell in self._cells_in_box(x - r, y - r, x + r, y + r):
+            found.update(self._vertex_grid.get(cell, ()))
+        return sorted(found, key=self._order.__getitem__)
+
+    def edges_near(self, pos, scale=1.0):
+        """Edges whose click area may contain the world point `pos` at zoom `scale`."""
+        extra = EDGE_MARGIN / scale - EDGE_MARGIN
+        if extra <= 0:
+            return list(self._edge_grid.get(self._cell(*pos), ()))
+        # Zoomed out, the click area spans more world units than the indexed margin
+        x, y = pos
+        found = set()
+        for cell in self._cells_in_box(x - extra, y - extra, x + extra, y + extra):
+            found.update(self._edge_grid.get(cell, ()))
+        return list(found)
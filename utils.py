@@ -1,148 +1,399 @@
 import colorsys
+import itertools
 import re
+from array import array
 from string import ascii_uppercase
-from config import AVOID_COLORS, VERTEX_RADIUS, DEBUG_FONT
-import pygame
+from config import AVOID_COLORS, VERTEX_RADIUS
+from csr import GraphSnapshot
+
+_version_counter = itertools.count(1)
+
+
+class TrackedList(list):
+    """
+    List that stamps itself with a fresh graph version on every mutation.
+    Attribute edits on the items (renames, weights) must call `touch()`.
+
+    `rewrites` counts every mutation other than appending. While it stays the
+    same, the list has only grown at the end, so incremental consumers can
+    process just the items past the length they last saw.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.version = next(_version_counter)
+        self.rewrites = 0
+
+    def _stamp(self):
+        self.version = next(_version_counter)
+
+    def touch(self):
+        self.rewrites += 1
+        self._stamp()
+
+    def append(self, item):
+        super().append(item)
+        self._stamp()
+
+    def extend(self, items):
+        super().extend(items)
+        self._stamp()
+
+    def insert(self, index, item):
+        super().insert(index, item)
+        self.touch()
+
+    def remove(self, item):
+        super().remove(item)
+        self.touch()
+
+    def pop(self, index=-1):
+        item = super().pop(index)
+        self.touch()
+        return item
+
+    def clear(self):
+        super().clear()
+        self.touch()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self.touch()
+
+    def reverse(self):
+        super().reverse()
+        self.touch()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self.touch()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self.touch()
+
+    def __iadd__(self, items):
+        result = super().__iadd__(items)
+        self._stamp()
+        return result
+
+    def __imul__(self, n):
+        result = super().__imul__(n)
+        self.touch()
+        return result
+
+
+class EdgeList(TrackedList):
+    """
+    TrackedList of edges that also indexes them by their (start, end) vertices,
+    so "is there an edge u->v" and "does this edge have an opposite" are O(1).
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._reindex()
+
+    def _reindex(self):
+        self._by_pair = {}
+        self._pair_count = {}
+        for e in self:
+            self._index(e)
+
+    def _index(self, e):
+        key = (e.start, e.end)
+        self._by_pair.setdefault(key, e)
+        self._pair_count[key] = self._pair_count.get(key, 0) + 1
+
+    def _unindex(self, e):
+        key = (e.start, e.end)
+        count = self._pair_count.get(key, 0) - 1
+        if count <= 0:
+            self._pair_count.pop(key, None)
+            self._by_pair.pop(key, None)
+            return
+        self._pair_count[key] = count
+        if self._by_pair.get(key) is e:
+            # A parallel edge survives; point the index at it instead
+            self._by_pair[key] = next(x for x in self if x is not e and (x.start, x.end) == key)
+
+    def find(self, start, end, directed=True):
+        """The edge start->end (or end->start when undirected), or None."""
+        edge = self._by_pair.get((start, end))
+        if edge is None and not directed:
+            edge = self._by_pair.get((end, start))
+        return edge
+
+    def has_opposite(self, edge):
+        if edge.start is edge.end:
+            return False  # a self-loop is its own reverse
+        return (edge.end, edge.start) in self._by_pair
+
+    def append(self, item):
+        super().append(item)
+        self._index(item)
+
+    def extend(self, items):
+        items = list(items)
+        super().extend(items)
+        # _index inlined: bulk loads add tens of thousands of edges at once
+        by_pair, pair_count = self._by_pair, self._pair_count
+        for e in items:
+            key = (e.start, e.end)
+            if key in pair_count:
+                pair_count[key] += 1
+            else:
+                pair_count[key] = 1
+                by_pair[key] = e
+
+    def insert(self, index, item):
+        super().insert(index, item)
+        self._index(item)
+
+    def remove(self, item):
+        super().remove(item)
+        self._unindex(item)
+
+    def pop(self, index=-1):
+        item = super().pop(index)
+        self._unindex(item)
+        return item
+
+    def clear(self):
+        super().clear()
+        self._reindex()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._reindex()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._reindex()
+
+    def __iadd__(self, items):
+        items = list(items)
+        result = super().__iadd__(items)
+        for e in items:
+            self._index(e)
+        return result
+
+    def __imul__(self, n):
+        result = super().__imul__(n)
+        self._reindex()
+        return result
+
+
+def graph_version(vertices, edges):
+    """Current version of the graph held in two TrackedLists (O(1), monotonic)."""
+    return max(vertices.version, edges.version)
+
+
+# Version numbers are globally unique, so one snapshot can serve every GraphState
+_shared_snapshot = (None, None)
+
 
 class GraphState:
-    def __init__(self, get_vertices, get_edges):
+    def __init__(self, get_vertices, get_edges, snapshot=None):
         self.get_vertices = get_vertices
         self.get_edges = get_edges
-        self._last_hash = None
-        self._adj = None
-        self._rev_adj = None
-        self._indexed_adj = {}
+        self._last_version = None
+        self._snapshot = snapshot
 
-    def _hash_graph(self):
-        v = tuple(sorted(v.name for v in self.get_vertices()))
-        e = tuple(sorted((e.start.name, e.end.name, str(e.value)) for e in self.get_edges()))  # include weights
-        return hash((v, e))
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """A state frozen on one snapshot, as used inside solver workers."""
+        return cls(None, None, snapshot)
+
+    def version(self):
+        if self.get_vertices is None:
+            return 0
+        return graph_version(self.get_vertices(), self.get_edges())
 
     def invalidate(self):
-        self._last_hash = None
-
-    def _check_update(self):
-        new_hash = self._hash_graph()
-        if new_hash != self._last_hash:
-            self._adj_dict = {}
-            self._rev_adj = None
-            self._indexed_adj.clear()
-            self._last_hash = new_hash
-
-    def get_adj(self, directed=False):
-        self._check_update()
-        key = "directed" if directed else "undirected"
-        if not hasattr(self, "_adj_dict"):
-            self._adj_dict = {}
-
-        if key in self._adj_dict:
-            return self._adj_dict[key]
-
-        adj = {v.name: [] for v in self.get_vertices()}
-        for e in self.get_edges():
-            w = float(e.value) if e.value is not None else 1.0
-            adj[e.start.name].append((e.end.name, w))
-            if not directed:
-                adj[e.end.name].append((e.start.name, w))
-
-        self._adj_dict[key] = adj
-        return adj
-
-    def get_rev_adj(self):
-        self._check_update()
-        if self._rev_adj is None:
-            rev = {v.name: set() for v in self.get_vertices()}
-            for e in self.get_edges():
-                rev[e.end.name].add(e.start.name)
-            self._rev_adj = rev
-        return self._rev_adj
-
-    def get_indexed_adj(self, directed=False):
-        self._check_update()
-        key = directed
-        if key in self._indexed_adj:
-            return self._indexed_adj[key]
-
-        index_map = {v.name: i for i, v in enumerate(self.get_vertices())}
-        adj = {i: set() for i in index_map.values()}
-        for e in self.get_edges():
-            i = index_map[e.start.name]
-            j = index_map[e.end.name]
-            adj[i].add(j)
-            if not directed:
-                adj[j].add(i)
-
-        self._indexed_adj[key] = (adj, index_map)
-        return adj, index_map
-
-
-def dfs_stack(adj, start, visited):
-    """Iterative DFS to visit all reachable nodes from `start`."""
+        self._last_version = None
+
+    def get_snapshot(self):
+        """GraphSnapshot of the current graph version, built at most once per version."""
+        global _shared_snapshot
+        if self.get_vertices is None:
+            return self._snapshot
+
+        version = self.version()
+        if version != self._last_version or self._snapshot is None:
+            cached_version, snapshot = _shared_snapshot
+            if cached_version != version:
+                snapshot = GraphSnapshot.from_graph(self.get_vertices(), self.get_edges())
+                _shared_snapshot = (version, snapshot)
+            self._snapshot = snapshot
+            self._last_version = version
+        return self._snapshot
+
+    def get_csr(self, directed=False):
+        """CSR adjacency of the current graph version."""
+        return self.get_snapshot().csr(directed)
+
+
+def dfs_stack(csr, start, visited, reverse=False):
+    """Iterative DFS marking every id reachable from `start` in `visited` (a bytearray).
+    Returns the newly visited ids; `reverse` walks incoming arcs instead."""
+    offsets = csr.rev_offsets if reverse else csr.offsets
+    targets = csr.rev_targets if reverse else csr.targets
+    reached = []
     stack = [start]
     while stack:
         node = stack.pop()
-        if node in visited:
+        if visited[node]:
             continue
-        visited.add(node)
-        neighbors = adj.get(node, [])
-        for neighbor in neighbors:
-            # Handle both (neighbor,) and (neighbor, weight) formats
-            if isinstance(neighbor, tuple):
-                neighbor = neighbor[0]
-            if neighbor not in visited:
+        visited[node] = 1
+        reached.append(node)
+        for p in range(offsets[node], offsets[node + 1]):
+            neighbor = targets[p]
+            if not visited[neighbor]:
                 stack.append(neighbor)
+    return reached
 
 
-
-def generic_dfs(adj, v, visited, *, parent=None, rec_stack=None,
-                tin=None, low=None, time=None, bridges=None,
-                on_path=None, on_exit=None):
+class LowLink:
     """
-    Generic DFS with customizable hooks:
-    - `rec_stack`: for cycle detection in directed graphs
-    - `tin`, `low`, `time`, `bridges`: for bridge-finding
-    - `on_path(path)`: for longest path backtracking
-    - `on_exit(node)`: for postorder (Kosaraju)
+    Results of one low-link DFS (see `lowlink_dfs`), over CSR vertex ids:
+    - `cyclic`: whether the graph has a cycle (self-loops and parallel edges count)
+    - `labels[i]`: SCC of vertex i for directed graphs, its component otherwise
+    - `count`: number of SCCs or components
+    - `bridges`: (parent, child) id pairs of the tree edges that are bridges
+    - `cut_vertices`: ids of the articulation points, ascending
+    Bridges and cut vertices are only computed for undirected graphs.
     """
 
-    visited.add(v)
-    if rec_stack is not None:
-        rec_stack.add(v)
-    if tin is not None:
-        tin[v] = low[v] = time[0]
-        time[0] += 1
+    def __init__(self, cyclic, labels, count, bridges, cut_vertices):
+        self.cyclic = cyclic
+        self.labels = labels
+        self.count = count
+        self.bridges = bridges
+        self.cut_vertices = cut_vertices
+
 
-    neighbors = adj[v]
-    for n, _ in neighbors:
-        if n == parent:
+def lowlink_dfs(csr):
+    """
+    Single-pass DFS with discovery times and low-links on an explicit stack,
+    so it handles graphs far deeper than the recursion limit. Directed graphs
+    get Tarjan's SCCs and cycle detection; undirected graphs get components,
+    bridges, articulation points and cycle detection. Only the first arc back
+    to the DFS parent is the tree edge, so parallel edges are a cycle, not a
+    bridge. Returns a LowLink.
+    """
+    n, offsets, targets, directed = csr.n, csr.offsets, csr.targets, csr.directed
+    tin = array("l", [-1]) * n
+    low = array("l", [0]) * n
+    labels = array("l", [-1]) * n
+    is_cut = bytearray(n)
+    bridges = []
+    cyclic = False
+    count = 0
+    timer = 0
+    scc_stack = []
+    on_stack = bytearray(n)
+
+    for root in range(n):
+        if tin[root] >= 0:
             continue
-        if n not in visited:
-            generic_dfs(adj, n, visited,
-                        parent=v, rec_stack=rec_stack,
-                        tin=tin, low=low, time=time, bridges=bridges,
-                        on_path=on_path, on_exit=on_exit)
-            if low is not None:
-                low[v] = min(low[v], low[n])
-                if bridges is not None and low[n] > tin[v]:
-                    bridges.append((min(v, n), max(v, n)))
+        tin[root] = low[root] = timer
+        timer += 1
+        if directed:
+            scc_stack.append(root)
+            on_stack[root] = 1
         else:
-            if low is not None:
-                low[v] = min(low[v], tin[n])
-            if rec_stack is not None and n in rec_stack:
-                raise Exception("CycleDetected")
-
-    if rec_stack is not None:
-        rec_stack.remove(v)
-    if on_exit:
-        on_exit(v)
-
-
-def dfs_paths_backtrack(adj, path, visited, on_path_found):
-    """Simple recursive DFS for full-path traversal (used for longest paths)."""
+            labels[root] = count
+        root_children = 0
+        # Frames of (vertex, parent, next arc); `skipped` marks parents whose tree arc was seen
+        nodes, parents, arcs = [root], [-1], [offsets[root]]
+        skipped = [False]
+        while nodes:
+            u = nodes[-1]
+            p, end = arcs[-1], offsets[u + 1]
+            parent = parents[-1]
+            child = -1
+            while p < end:
+                v = targets[p]
+                p += 1
+                if tin[v] < 0:
+                    child = v
+                    break
+                if directed:
+                    if on_stack[v]:
+                        cyclic = True
+                        if tin[v] < low[u]:
+                            low[u] = tin[v]
+                elif v == parent and not skipped[-1]:
+                    skipped[-1] = True
+                else:
+                    cyclic = True
+                    if tin[v] < low[u]:
+                        low[u] = tin[v]
+
+            if child >= 0:
+                arcs[-1] = p
+                tin[child] = low[child] = timer
+                timer += 1
+                if directed:
+                    scc_stack.append(child)
+                    on_stack[child] = 1
+                else:
+                    labels[child] = count
+                if parent < 0:
+                    root_children += 1
+                nodes.append(child)
+                parents.append(u)
+                arcs.append(offsets[child])
+                skipped.append(False)
+                continue
+
+            nodes.pop()
+            parents.pop()
+            arcs.pop()
+            skipped.pop()
+            if directed and low[u] == tin[u]:
+                while True:
+                    w = scc_stack.pop()
+                    on_stack[w] = 0
+                    labels[w] = count
+                    if w == u:
+                        break
+                count += 1
+            if parent >= 0:
+                if low[u] < low[parent]:
+                    low[parent] = low[u]
+                if not directed:
+                    if low[u] > tin[parent]:
+                        bridges.append((parent, u))
+                    if low[u] >= tin[parent] and parents[-1] >= 0:
+                        is_cut[parent] = 1
+        if not directed:
+            if root_children > 1:
+                is_cut[root] = 1
+            count += 1
+
+    cut_vertices = [i for i in range(n) if is_cut[i]]
+    return LowLink(cyclic, labels, count, bridges, cut_vertices)
+
+
+def dfs_paths_backtrack(csr, path, visited, on_path_found):
+    """DFS over every simple path extending `path` on an explicit stack (used for longest paths).
+    `path` and the `visited` bytearray are extended and restored in place."""
     on_path_found(path)
-    for neighbor, _ in adj[path[-1]]:
-        if neighbor not in visited:
-            dfs_paths_backtrack(adj, path + [neighbor], visited | {neighbor}, on_path_found)
+    base = len(path)
+    exits = [iter(csr.neighbors(path[-1]))]  # untried neighbors of each vertex past the base
+    while exits:
+        for neighbor in exits[-1]:
+            if not visited[neighbor]:
+                visited[neighbor] = 1
+                path.append(neighbor)
+                on_path_found(path)
+                exits.append(iter(csr.neighbors(neighbor)))
+                break
+        else:
+            exits.pop()
+            if len(path) > base:
+                visited[path.pop()] = 0
 
 def color_distance(c1, c2):
     # Euclidean distance in RGB
@@ -211,11 +462,13 @@ def is_within_screen(positions, screen_rect):
             return False
     return True
 
-def is_within_screen_margin(positions, rect, margin_x, margin_y):
+def is_within_bounds(positions, bounds, margin_x, margin_y):
+    """True if every position lies inside `bounds` (left, top, right, bottom) widened by the margins."""
+    left, top, right, bottom = bounds
     for x, y in positions:
-        if x < -margin_x or x > rect.width + margin_x:
+        if x < left - margin_x or x > right + margin_x:
             return False
-        if y < -margin_y or y > rect.height + margin_y:
+        if y < top - margin_y or y > bottom + margin_y:
             return False
     return True
 
@@ -227,6 +480,7 @@ def update_k_value_from_input(input_text):
         return None
 
 def draw_fps(screen, clock):
+    from config import DEBUG_FONT
     fps = int(clock.get_fps())
     text = DEBUG_FONT.render(f"{fps} FPS", True, (150, 255, 150))
     screen.blit(text, text.get_rect(bottomright=(screen.get_width()-20, screen.get_height()-5)))
@@ -246,6 +500,7 @@ def deduplicate_edges_for_undirected(edges):
 def generate_random_graph(vertices, edges, name_iter, min_v=5, max_v=10, min_e=5, max_e=20):
     from graph import Vertex, Edge  # Already imported
     import random
+    import pygame
 
     vertices.clear()
     edges.clear()
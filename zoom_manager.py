@@ -1,20 +1,49 @@
 class ZoomManager:
+    """
+    Camera between world coordinates (Vertex.pos) and the screen:
+    screen = world * scale + offset. Zooming and panning only change the
+    camera, so vertex positions are never rewritten and stay exact.
+    """
+
     def __init__(self):
         self.scale = 1.0
         self.min_scale = 0.4
         self.max_scale = 2.0
+        self.offset_x = 0.0
+        self.offset_y = 0.0
+
+    @property
+    def key(self):
+        """Hashable camera state, for render caches."""
+        return self.scale, self.offset_x, self.offset_y
+
+    def to_screen(self, pos):
+        return pos[0] * self.scale + self.offset_x, pos[1] * self.scale + self.offset_y
 
-    def apply_zoom(self, zoom_in, center, vertices):
+    def to_world(self, pos):
+        return (pos[0] - self.offset_x) / self.scale, (pos[1] - self.offset_y) / self.scale
+
+    def world_bounds(self, rect):
+        """(left, top, right, bottom) of the world area shown in the screen `rect`."""
+        x, y, width, height = rect
+        left, top = self.to_world((x, y))
+        return left, top, left + width / self.scale, top + height / self.scale
+
+    def apply_zoom(self, zoom_in, center):
+        """Zoom around the screen point `center`, which stays over the same world point."""
         factor = 1.1 if zoom_in else 0.9
         new_scale = self.scale * factor
         if not (self.min_scale <= new_scale <= self.max_scale):
             return
 
         cx, cy = center
-        for v in vertices:
-            dx = v.pos[0] - cx
-            dy = v.pos[1] - cy
-            v.pos[0] = int(cx + dx * factor)
-            v.pos[1] = int(cy + dy * factor)
+        self.offset_x = cx - (cx - self.offset_x) * factor
+        self.offset_y = cy - (cy - self.offset_y) * factor
+        self.scale = new_scale
+
+    def pan(self, dx, dy):
+        self.offset_x += dx
+        self.offset_y += dy
 
-        self.scale = new_scale
\ No newline at end of file
+    def reset(self):
+        self.__init__()